@@ -4,5 +4,6 @@ API Routes module
 
 from . import documents
 from . import chat
+from . import translations
 
-__all__ = ["documents", "chat"]
\ No newline at end of file
+__all__ = ["documents", "chat", "translations"]
\ No newline at end of file
@@ -1,17 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from app.core.security import verify_api_key
-from app.services.rag_service import get_rag_service
-from app.services.speech_service import get_speech_service
-from app.services.stt_service import get_stt_service
-from app.models.schemas import ChatRequest, ChatResponse, TTSRequest
+from app.services.rag_service import RAGService, get_rag_service
+from app.services.speech_service import SpeechService, get_speech_service
+from app.services.stt_service import STTService, get_stt_service
+from app.models.schemas import (
+    ChatBatchRequest, ChatBatchResponse, ChatRequest, ChatResponse, ChatStreamRequest, TTSRequest
+)
 from typing import List
 from pydantic import BaseModel
-import traceback
-import tempfile
+import logging
+import aiofiles
+import aiofiles.tempfile
 import os
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Audio uploads are copied to disk in pieces of this size
+AUDIO_CHUNK_SIZE = 1 << 16
 
 
 # Request model for translation comparison
@@ -26,12 +33,12 @@ class CompareRequest(BaseModel):
 @router.post("", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """Chat endpoint for question answering"""
     try:
-        rag_service = get_rag_service()
-        result = rag_service.query(
+        result = await rag_service.aquery(
             question=request.question,
             k=request.k,
             include_sources=request.include_sources
@@ -40,17 +47,89 @@ async def chat(
         return ChatResponse(**result)
         
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Chat failed")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Chat failed: {str(e)}"
+        )
+
+
+@router.post("/batch", response_model=ChatBatchResponse)
+async def chat_batch(
+    request: ChatBatchRequest,
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Answer several questions together (embedded in one batch, answered concurrently)"""
+    try:
+        results = await rag_service.aquery_batch(
+            questions=request.questions,
+            k=request.k,
+            include_sources=request.include_sources
+        )
+        
+        return ChatBatchResponse(
+            success=all(result['success'] for result in results),
+            results=[ChatResponse(**result) for result in results]
+        )
+        
+    except Exception as e:
+        logger.exception("Batch chat failed")
         raise HTTPException(
             status_code=500,
             detail=f"Chat failed: {str(e)}"
         )
 
 
+@router.post("/stream")
+async def chat_stream(
+    request: ChatStreamRequest,
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service),
+    speech_service: SpeechService = Depends(get_speech_service)
+):
+    """
+    Spoken chat endpoint - streams MP3 audio while the answer is generated
+    
+    Each sentence is sent to TTS as soon as the LLM finishes it, so audio
+    starts playing before the full answer exists.
+    
+    Returns:
+        Streamed audio (MP3)
+    """
+    audio_stream = speech_service.stream_speech(
+        rag_service.astream_answer(request.question, request.k),
+        request.voice,
+        request.rate,
+        request.pitch
+    )
+    
+    return StreamingResponse(audio_stream, media_type="audio/mpeg")
+
+
+@router.post("/stream-text")
+async def chat_stream_text(
+    request: ChatRequest,
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Text chat endpoint - streams the answer as the LLM generates it
+    
+    Returns:
+        Streamed plain text (the same answer /api/chat returns, sent token by token)
+    """
+    return StreamingResponse(
+        rag_service.astream_answer(request.question, request.k),
+        media_type="text/plain; charset=utf-8"
+    )
+
+
 @router.post("/stt")
 async def speech_to_text(
     audio: UploadFile = File(...),
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    stt_service: STTService = Depends(get_stt_service)
 ):
     """
     Convert speech audio to text using Groq Whisper
@@ -61,21 +140,20 @@ async def speech_to_text(
     Returns:
         Transcribed text
     """
-    # Save uploaded audio to temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as tmp:
-        content = await audio.read()
-        tmp.write(content)
+    # Stream uploaded audio to a temporary file without buffering it all in memory
+    async with aiofiles.tempfile.NamedTemporaryFile('wb', suffix=".webm", delete=False) as tmp:
+        while chunk := await audio.read(AUDIO_CHUNK_SIZE):
+            await tmp.write(chunk)
         tmp_path = tmp.name
     
     try:
-        # Get STT service and transcribe
-        stt_service = get_stt_service()
+        # Transcribe
         result = stt_service.transcribe_audio(tmp_path)
         
         return result
     
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("STT failed")
         raise HTTPException(
             status_code=500,
             detail=f"STT failed: {str(e)}"
@@ -90,7 +168,8 @@ async def speech_to_text(
 @router.post("/tts")
 async def text_to_speech(
     request: TTSRequest,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    speech_service: SpeechService = Depends(get_speech_service)
 ):
     """
     Convert text to speech using Edge TTS
@@ -99,22 +178,30 @@ async def text_to_speech(
         request: TTSRequest with text, voice, rate, pitch
     
     Returns:
-        Audio file (MP3)
+        Streamed audio (MP3), sent as Edge TTS produces it
     """
     try:
         if not request.text:
             raise HTTPException(status_code=400, detail="Text is required")
         
-        speech_service = get_speech_service()
-        audio_bytes = await speech_service.text_to_speech(
+        audio_stream = speech_service.stream_tts(
             request.text, 
             request.voice, 
             request.rate, 
             request.pitch
         )
         
-        return Response(
-            content=audio_bytes,
+        # Wait for the first chunk here, so a failure to start synthesis
+        # (bad voice, no connection) is still reported as a 500
+        first_chunk = await anext(audio_stream, b"")
+        
+        async def audio_body():
+            yield first_chunk
+            async for chunk in audio_stream:
+                yield chunk
+        
+        return StreamingResponse(
+            audio_body(),
             media_type="audio/mpeg",
             headers={"Content-Disposition": "inline; filename=speech.mp3"}
         )
@@ -122,14 +209,15 @@ async def text_to_speech(
     except HTTPException:
         raise
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("TTS failed")
         raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
 
 
 @router.post("/compare")
 async def compare_translations(
     request: CompareRequest,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Compare the same Bible passage across multiple translations
@@ -143,23 +231,27 @@ async def compare_translations(
     }
     """
     try:
-        rag_service = get_rag_service()
-        
-        result = rag_service.compare_translations(
+        result = await rag_service.acompare_translations(
             question=request.question,
             translation_ids=request.translation_ids,
             k=request.k
         )
         
-        # Optionally remove chunks to reduce response size
+        # Optionally remove chunks to reduce response size - on copies, since the
+        # result may be the service's cached comparison
         if not request.include_chunks and result.get('success'):
-            for comparison in result.get('comparisons', []):
-                comparison.pop('chunks', None)
+            result = {
+                **result,
+                'comparisons': [
+                    {key: value for key, value in comparison.items() if key != 'chunks'}
+                    for comparison in result.get('comparisons', [])
+                ]
+            }
         
         return result
         
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Comparison failed")
         raise HTTPException(
             status_code=500,
             detail=f"Comparison failed: {str(e)}"
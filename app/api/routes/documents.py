@@ -2,20 +2,25 @@
 API Routes for Document Management (Translation-Specific)
 """
 
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from app.core.security import verify_api_key
-from app.services.document_service import get_document_service
-from app.services.rag_service import get_rag_service
-import traceback
+from app.services.document_service import DocumentService, get_document_service
+from app.services.rag_service import RAGService, get_rag_service
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/{translation_id}/upload")
 async def upload_document_to_translation(
     translation_id: str,
     file: UploadFile = File(...),
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service),
+    doc_service: DocumentService = Depends(get_document_service)
 ):
     """
     Upload a document to a specific Bible translation
@@ -29,17 +34,13 @@ async def upload_document_to_translation(
     """
     try:
         # Verify translation exists
-        rag_service = get_rag_service()
-        translations_metadata = rag_service._load_translations_metadata()
-        
-        if translation_id not in translations_metadata:
+        if rag_service.get_translation(translation_id) is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Translation '{translation_id}' not found"
             )
         
         # Process document for this specific translation
-        doc_service = get_document_service()
         result = await doc_service.process_document(file, translation_id)
         
         if result['success']:
@@ -54,7 +55,55 @@ async def upload_document_to_translation(
     except HTTPException:
         raise
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Upload failed")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Upload failed: {str(e)}"
+        )
+
+
+@router.post("/{translation_id}/upload-batch")
+async def upload_documents_to_translation(
+    translation_id: str,
+    files: List[UploadFile] = File(...),
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service),
+    doc_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Upload several documents to a specific Bible translation at once
+    
+    Args:
+        translation_id: ID of the translation to upload to
+        files: Document files (PDF, TXT, MD, DOCX)
+    
+    Returns:
+        Overall success status, chunks created, and a result per file
+    """
+    try:
+        # Verify translation exists
+        if rag_service.get_translation(translation_id) is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Translation '{translation_id}' not found"
+            )
+        
+        # Files are parsed in parallel, then embedded together
+        result = await doc_service.process_documents(files, translation_id)
+        
+        if result['success']:
+            # Update chunk count in metadata
+            rag_service.update_translation_chunk_count(
+                translation_id,
+                result['total_chunks']
+            )
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Batch upload failed")
         raise HTTPException(
             status_code=500,
             detail=f"Upload failed: {str(e)}"
@@ -64,7 +113,8 @@ async def upload_document_to_translation(
 @router.get("/{translation_id}/stats")
 async def get_translation_stats(
     translation_id: str,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Get statistics for a specific translation
@@ -76,17 +126,14 @@ async def get_translation_stats(
         Translation statistics
     """
     try:
-        rag_service = get_rag_service()
-        translations_metadata = rag_service._load_translations_metadata()
+        translation_info = rag_service.get_translation(translation_id)
         
-        if translation_id not in translations_metadata:
+        if translation_info is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Translation '{translation_id}' not found"
             )
         
-        translation_info = translations_metadata[translation_id]
-        
         return {
             'success': True,
             'translation_id': translation_id,
@@ -99,7 +146,7 @@ async def get_translation_stats(
     except HTTPException:
         raise
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Failed to get stats")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get stats: {str(e)}"
@@ -107,7 +154,10 @@ async def get_translation_stats(
 
 
 @router.get("/stats")
-async def get_all_stats(api_key: str = Depends(verify_api_key)):
+async def get_all_stats(
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """
     Get statistics for all translations
     
@@ -115,7 +165,6 @@ async def get_all_stats(api_key: str = Depends(verify_api_key)):
         List of all translation statistics
     """
     try:
-        rag_service = get_rag_service()
         translations = rag_service.get_available_translations()
         
         return {
@@ -125,7 +174,7 @@ async def get_all_stats(api_key: str = Depends(verify_api_key)):
         }
         
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Failed to get stats")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get stats: {str(e)}"
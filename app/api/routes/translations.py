@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from app.core.security import verify_api_key
-from app.services.rag_service import get_rag_service
+from app.services.rag_service import RAGService, get_rag_service
 
 router = APIRouter()
 
@@ -22,10 +22,11 @@ class SwitchTranslationRequest(BaseModel):
 
 
 @router.get("/list")
-async def list_translations():  # Remove: api_key: str = Depends(verify_api_key)
+async def list_translations(  # Remove: api_key: str = Depends(verify_api_key)
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """Get list of all available Bible translations"""
     try:
-        rag_service = get_rag_service()
         translations = rag_service.get_available_translations()
         
         return {
@@ -41,7 +42,10 @@ async def list_translations():  # Remove: api_key: str = Depends(verify_api_key)
 
 
 @router.get("/current")
-async def get_current_translation(api_key: str = Depends(verify_api_key)):
+async def get_current_translation(
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
+):
     """
     Get the currently active translation
     
@@ -49,7 +53,6 @@ async def get_current_translation(api_key: str = Depends(verify_api_key)):
         Current translation info or null if none selected
     """
     try:
-        rag_service = get_rag_service()
         current = rag_service.get_current_translation()
         
         return {
@@ -67,7 +70,8 @@ async def get_current_translation(api_key: str = Depends(verify_api_key)):
 @router.post("/create")
 async def create_translation(
     request: CreateTranslationRequest,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Create a new Bible translation collection
@@ -79,7 +83,6 @@ async def create_translation(
         Success status and message
     """
     try:
-        rag_service = get_rag_service()
         result = rag_service.create_translation(
             translation_id=request.translation_id,
             name=request.name,
@@ -103,7 +106,8 @@ async def create_translation(
 @router.delete("/{translation_id}")
 async def delete_translation(
     translation_id: str,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Delete a Bible translation and its database
@@ -115,7 +119,6 @@ async def delete_translation(
         Success status and message
     """
     try:
-        rag_service = get_rag_service()
         result = rag_service.delete_translation(translation_id)
         
         if not result['success']:
@@ -135,7 +138,8 @@ async def delete_translation(
 @router.post("/switch")
 async def switch_translation(
     request: SwitchTranslationRequest,
-    api_key: str = Depends(verify_api_key)
+    api_key: str = Depends(verify_api_key),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Switch to a different Bible translation
@@ -147,7 +151,6 @@ async def switch_translation(
         Success status and translation info
     """
     try:
-        rag_service = get_rag_service()
         result = rag_service.switch_translation(request.translation_id)
         
         if not result['success']:
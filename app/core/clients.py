@@ -0,0 +1,43 @@
+"""
+Shared HTTP clients
+One connection-pooled Groq client (sync and async) per process, so every
+service reuses the same keep-alive connections instead of opening its own
+"""
+
+from functools import lru_cache
+
+import httpx
+from groq import Groq, AsyncGroq
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(30.0)
+
+
+@lru_cache()
+def get_groq_client() -> Groq:
+    """Get the process-wide Groq client"""
+    return Groq(
+        api_key=settings.GROQ_API_KEY,
+        http_client=httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    )
+
+
+@lru_cache()
+def get_async_groq_client() -> AsyncGroq:
+    """Get the process-wide AsyncGroq client"""
+    return AsyncGroq(
+        api_key=settings.GROQ_API_KEY,
+        http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    )
+
+
+async def close_clients():
+    """Close pooled connections (called on application shutdown)"""
+    if get_async_groq_client.cache_info().currsize:
+        await get_async_groq_client().close()
+    if get_groq_client.cache_info().currsize:
+        get_groq_client().close()
@@ -5,6 +5,7 @@ FULLY FREE - No OpenAI Required
 
 import os
 from functools import lru_cache
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -16,6 +17,13 @@ class Settings(BaseSettings):
     
     # Model Configuration
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"  # FREE HuggingFace
+    EMBEDDING_BATCH_SIZE: int = 64  # CPU batch size (GPUs use larger batches)
+    EMBEDDING_DEVICE: Optional[str] = None  # cuda / mps / cpu - auto-detected if unset
+    # CPU inference backend: torch, or onnx / openvino (needs optimum[onnxruntime] / optimum[openvino])
+    EMBEDDING_BACKEND: str = "torch"
+    # Exported model file for the onnx/openvino backend, e.g. onnx/model_qint8_avx512_vnni.onnx (int8)
+    EMBEDDING_MODEL_FILE: Optional[str] = None
+    TORCH_NUM_THREADS: Optional[int] = None  # CPU threads for embedding - defaults to cores / WEB_CONCURRENCY
     CHAT_MODEL: str = "llama-3.1-70b-versatile"  # FREE Groq
     
     # Groq API
@@ -24,10 +32,30 @@ class Settings(BaseSettings):
     # RAG Configuration
     CHROMA_DB_PATH: str = "./chroma_db"
     RETRIEVAL_K: int = 3
+    
+    # HNSW index parameters (applied to newly created translation collections)
+    HNSW_M: int = 32
+    HNSW_CONSTRUCTION_EF: int = 200
+    HNSW_SEARCH_EF: int = 64
+    
+    # Translations up to this many chunks are searched from an in-memory copy (0 = always use Chroma)
+    DENSE_INDEX_MAX_CHUNKS: int = 50000
+    # How often a cached dense index is compared with its collection (uploads in other workers)
+    DENSE_INDEX_RECHECK_SECONDS: int = 30
     TEMPERATURE: float = 0.7
     
+    # Query Cache Configuration
+    EMBEDDING_CACHE_SIZE: int = 1024
+    ANSWER_CACHE_SIZE: int = 256
+    ANSWER_CACHE_THRESHOLD: float = 0.97  # Cosine similarity to reuse an answer (1.0 = exact only)
+    ANSWER_CACHE_TTL_SECONDS: int = 300  # How long a cached answer may be reused
+    RETRIEVAL_CACHE_SIZE: int = 512
+    
     # File Upload Configuration
     UPLOAD_DIR: str = "./uploads"
+    MAX_UPLOAD_SIZE_MB: int = 50  # Per file
+    MAX_BATCH_UPLOAD_SIZE_MB: int = 200  # Whole /upload-batch request (each file is still capped above)
+    PARSE_WORKERS: int = 2  # Processes used to parse/split uploads
     
     # Server Configuration
     HOST: str = "0.0.0.0"
@@ -35,6 +63,12 @@ class Settings(BaseSettings):
     
     # Security
     API_KEY: str
+    SESSION_TTL_SECONDS: int = 86400
+    REDIS_URL: Optional[str] = None  # Share sessions across workers (in-memory if unset)
+    
+    # CORS - list the sites that embed the widget, e.g. ["https://example.org"]
+    CORS_ORIGINS: List[str] = ["*"]
+    CORS_MAX_AGE: int = 86400  # Seconds browsers may cache preflight responses
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,63 @@
+"""
+Logging configuration
+Log records are handed to a queue and formatted and written to stderr by a
+background thread, so request handlers never block on console I/O or
+traceback formatting
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+    The stock prepare() formats the whole record - including the traceback of
+    logger.exception() calls - in the logging thread. Only the message is
+    merged here (its args may change once the call returns); exc_info is
+    passed through the in-process queue and formatted by the listener
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: int = logging.INFO):
+    """Route the app's loggers through a QueueHandler and start the listener thread"""
+    global _listener
+    
+    if _listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(level)
+    app_logger.addHandler(DeferredQueueHandler(log_queue))
+    app_logger.propagate = False
+    
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
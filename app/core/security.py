@@ -1,21 +1,57 @@
 from fastapi import HTTPException, Header, Depends
 from typing import Optional
+import hmac
+import time
+from collections import deque
 from app.core.config import get_settings
 
 settings = get_settings()
 
-# Simple in-memory session store (for development)
-# In production, use Redis or a database
+# Admin key encoded once for constant-time comparison
+_API_KEY_BYTES = settings.API_KEY.encode()
+
+# Session store: Redis when REDIS_URL is set (shared across workers),
+# otherwise an in-memory dict of token -> expiry time (single worker / development)
+SESSION_KEY_PREFIX = "sess:"
+
+if settings.REDIS_URL:
+    import redis.asyncio as redis
+    redis_client = redis.from_url(settings.REDIS_URL)
+else:
+    redis_client = None
+
 active_sessions = {}
+# (expiry, token) in creation order - every session has the same TTL, so this is
+# also expiry order and pruning stops at the first live session
+_session_expiries = deque()
 
-def create_session(token: str):
+async def create_session(token: str):
     """Add a session token to active sessions"""
-    active_sessions[token] = {'active': True}
+    if redis_client is not None:
+        await redis_client.set(SESSION_KEY_PREFIX + token, "1", ex=settings.SESSION_TTL_SECONDS)
+    else:
+        now = time.monotonic()
+        # Drop expired sessions so the dict doesn't grow forever (amortized O(1))
+        while _session_expiries and _session_expiries[0][0] < now:
+            _, expired = _session_expiries.popleft()
+            active_sessions.pop(expired, None)
+        expires_at = now + settings.SESSION_TTL_SECONDS
+        active_sessions[token] = expires_at
+        _session_expiries.append((expires_at, token))
     return token
 
-def verify_session_token(token: str) -> bool:
+async def verify_session_token(token: str) -> bool:
     """Check if session token is valid"""
-    return token in active_sessions and active_sessions[token].get('active', False)
+    if redis_client is not None:
+        return bool(await redis_client.exists(SESSION_KEY_PREFIX + token))
+    
+    expires_at = active_sessions.get(token)
+    if expires_at is None:
+        return False
+    if expires_at < time.monotonic():
+        del active_sessions[token]
+        return False
+    return True
 
 async def verify_api_key(authorization: Optional[str] = Header(None)) -> str:
     """
@@ -33,17 +69,14 @@ async def verify_api_key(authorization: Optional[str] = Header(None)) -> str:
         )
     
     # Extract token
-    if authorization.startswith("Bearer "):
-        token = authorization[7:]
-    else:
-        token = authorization
+    token = authorization.removeprefix("Bearer ")
     
-    # Check if it's the admin API key from .env
-    if token == settings.API_KEY:
+    # Check if it's the admin API key from .env (constant-time to avoid timing leaks)
+    if hmac.compare_digest(token.encode(), _API_KEY_BYTES):
         return token
     
     # Check if it's a valid session token
-    if verify_session_token(token):
+    if await verify_session_token(token):
         return token
     
     # Token is neither API key nor valid session
@@ -1,33 +1,209 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers
+import gzip
+import orjson
+import os
+import re
 import secrets
+import shutil
+from typing import Optional
 
 from app.core.config import get_settings
 from app.core.security import create_session  # ✅ ADD THIS
+from app.core.clients import close_clients
+from app.core.logging_config import setup_logging, shutdown_logging
 from app.api.routes import chat, documents, translations
+from app.services.document_service import (
+    MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, get_document_service, shutdown_parse_pool
+)
+from app.services.rag_service import get_rag_service
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # Build the services (and load and warm the embedding model) in a worker
+    # thread, before the first request would otherwise do it on the event loop
+    await asyncio.to_thread(get_rag_service)
+    await asyncio.to_thread(get_document_service)
+    yield
+    # Release pooled Groq connections
+    await close_clients()
+    shutdown_parse_pool()
+    shutdown_logging()
+
+
+# Browsers may reuse HTML pages for 10 minutes, then revalidate via ETag
+HTML_CACHE_CONTROL = "public, max-age=600"
+
+# Root page, plus a gzip copy built once so it is never compressed per request
+INDEX_HTML_PATH = "static/index.html"
+INDEX_GZ_PATH = INDEX_HTML_PATH + ".gz"
+
+
+def _build_precompressed_index():
+    """(Re)write static/index.html.gz when it is missing or older than index.html"""
+    if (not os.path.exists(INDEX_GZ_PATH)
+            or os.path.getmtime(INDEX_GZ_PATH) < os.path.getmtime(INDEX_HTML_PATH)):
+        with open(INDEX_HTML_PATH, "rb") as src, gzip.open(INDEX_GZ_PATH, "wb", compresslevel=9) as dst:
+            shutil.copyfileobj(src, dst)
+
+
+_build_precompressed_index()
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip
+    An explicit "gzip" entry decides; otherwise "*" does. Either is refused by q=0
+    """
+    wildcard = False
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        
+        if coding == "gzip":
+            return q > 0
+        wildcard = q > 0
+    
+    return wildcard
+
+
+def _not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """Check the request's conditional headers against a page's validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # "*" matches any current representation; tags compare weakly (RFC 9110 13.1.2)
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    return request.headers.get("if-modified-since") == last_modified
+
+
+def _html_file(request: Request, path: str, headers: Optional[dict] = None) -> Response:
+    """Serve an HTML file, answering 304 when the browser's copy is current"""
+    response = FileResponse(
+        path,
+        media_type="text/html",
+        stat_result=os.stat(path),
+        headers={"Cache-Control": HTML_CACHE_CONTROL, **(headers or {})}
+    )
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+    
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers={
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Cache-Control": HTML_CACHE_CONTROL,
+        })
+    
+    return response
+
+
+# Fingerprinted asset names (e.g. widget.3f9a1c2b.js) never change content
+FINGERPRINTED_PATH = re.compile(r"\.[0-9a-f]{8,}\.\w+$")
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that tells browsers how long they may reuse each file"""
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if FINGERPRINTED_PATH.search(scope["path"]):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = HTML_CACHE_CONTROL
+        return response
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversize uploads from the declared Content-Length, before the
+    multipart body is read and spooled to disk
+    Pure ASGI (not @app.middleware), so every other request - health checks,
+    static files, streamed answers and audio - passes straight through.
+    A batch request carries several files, so it is held to its own total
+    limit (each file is still checked against MAX_UPLOAD_SIZE_MB while it is saved)
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        limit = self._limit_for(scope)
+        if limit is not None:
+            max_bytes, max_mb, what = limit
+            content_length = Headers(scope=scope).get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                response = ORJSONResponse(
+                    status_code=413,
+                    content={"detail": f"{what} too large. Maximum size is {max_mb} MB"}
+                )
+                await response(scope, receive, send)
+                return
+        
+        await self.app(scope, receive, send)
+    
+    @staticmethod
+    def _limit_for(scope) -> Optional[tuple]:
+        """(max bytes, max MB, what) for an upload request, None for anything else"""
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return None
+        
+        path = scope["path"]
+        if path.startswith("/api/documents/"):
+            if path.endswith("/upload-batch"):
+                return MAX_BATCH_UPLOAD_BYTES, settings.MAX_BATCH_UPLOAD_SIZE_MB, "Batch"
+            return MAX_UPLOAD_BYTES, settings.MAX_UPLOAD_SIZE_MB, "File"
+        if path == "/api/chat/stt":
+            return MAX_UPLOAD_BYTES, settings.MAX_UPLOAD_SIZE_MB, "File"
+        return None
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Bible Conversations API",
     description="Multi-Translation Bible Study System with RAG and Voice AI",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
+# Auth travels in the Authorization header, not cookies, so credentials are
+# only enabled for an explicit origin list (browsers reject them with "*")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials="*" not in settings.CORS_ORIGINS,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=settings.CORS_MAX_AGE,
 )
 
+# Reject oversize uploads before their bodies are read (see UploadSizeLimitMiddleware)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Include API routers
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
@@ -36,12 +212,31 @@ app.include_router(translations.router, prefix="/api/translations", tags=["trans
 
 # Root endpoint
 @app.get("/")
-async def root():
-    return HTMLResponse("""
+async def root(request: Request):
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        return _html_file(request, INDEX_GZ_PATH, {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return _html_file(request, INDEX_HTML_PATH, {"Vary": "Accept-Encoding"})
+
+# Admin panel (FileResponse streams straight from disk, using sendfile when available)
+@app.get("/admin")
+async def admin(request: Request):
+    return _html_file(request, "static/admin.html")
+
+# Chat interface
+@app.get("/chat")
+async def chat_page(request: Request):
+    return _html_file(request, "static/chat.html")
+
+# Agent page template - split once into byte segments around the session token
+AGENT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
-        <title>Bible Conversations</title>
+        <title>Bible Study Agent</title>
+        <script>
+            const SESSION_TOKEN = "%TOKEN%";
+            const API_BASE = "http://127.0.0.1:8009";
+        </script>
         <style>
             body {
                 font-family: 'Segoe UI', sans-serif;
@@ -54,62 +249,30 @@ async def root():
             }
             .container {
                 background: white;
-                padding: 50px;
+                padding: 40px;
                 border-radius: 20px;
                 box-shadow: 0 10px 40px rgba(0,0,0,0.3);
                 text-align: center;
-                max-width: 600px;
             }
             h1 {
                 color: #1E3A8A;
-                margin-bottom: 20px;
-            }
-            .links {
-                display: grid;
-                grid-template-columns: 1fr 1fr;
-                gap: 15px;
-                margin-top: 30px;
-            }
-            a {
-                display: block;
-                padding: 15px 25px;
-                background: linear-gradient(135deg, #1E3A8A 0%, #D97706 100%);
-                color: white;
-                text-decoration: none;
-                border-radius: 10px;
-                transition: transform 0.3s;
-            }
-            a:hover {
-                transform: translateY(-2px);
             }
         </style>
     </head>
     <body>
         <div class="container">
-            <h1>📖 Bible Conversations</h1>
-            <p>Multi-Translation Bible Study System</p>
-            <div class="links">
-                <a href="/static/bibleconversation.html">🎤 Bible Widget</a>
-                <a href="/admin">⚙️ Admin Panel</a>
-                <a href="/chat">💬 Chat Interface</a>
-                <a href="/docs">📚 API Docs</a>
-            </div>
+            <h1>📖 Bible Study Agent</h1>
+            <p>Session Active</p>
+            <p>Token: <code>%TOKEN_PREVIEW%...</code></p>
         </div>
     </body>
     </html>
-    """)
-
-# Admin panel
-@app.get("/admin")
-async def admin():
-    with open("static/admin.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
-
-# Chat interface
-@app.get("/chat")
-async def chat_page():
-    with open("static/chat.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+    """
+_agent_head, _agent_rest = AGENT_HTML.split("%TOKEN%")
+_agent_mid, _agent_tail = _agent_rest.split("%TOKEN_PREVIEW%")
+AGENT_PREFIX = _agent_head.encode("utf-8")
+AGENT_MID = _agent_mid.encode("utf-8")
+AGENT_SUFFIX = _agent_tail.encode("utf-8")
 
 # Agent page (voice interface)
 @app.get("/agent")
@@ -118,55 +281,25 @@ async def agent():
     token = secrets.token_urlsafe(32)
     
     # ✅ CRITICAL FIX: Register the session
-    create_session(token)
+    await create_session(token)
     
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Bible Study Agent</title>
-        <script>
-            const SESSION_TOKEN = "{token}";
-            const API_BASE = "http://127.0.0.1:8009";
-        </script>
-        <style>
-            body {{
-                font-family: 'Segoe UI', sans-serif;
-                background: linear-gradient(135deg, #1E3A8A 0%, #D97706 100%);
-                min-height: 100vh;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                margin: 0;
-            }}
-            .container {{
-                background: white;
-                padding: 40px;
-                border-radius: 20px;
-                box-shadow: 0 10px 40px rgba(0,0,0,0.3);
-                text-align: center;
-            }}
-            h1 {{
-                color: #1E3A8A;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>📖 Bible Study Agent</h1>
-            <p>Session Active</p>
-            <p>Token: <code>{token[:16]}...</code></p>
-        </div>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html)
+    token_bytes = token.encode("ascii")
+    body = b"".join([AGENT_PREFIX, token_bytes, AGENT_MID, token_bytes[:16], AGENT_SUFFIX])
+    return HTMLResponse(content=body)
+
+# Health check - the body never changes, so it is serialized once at import
+HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "Bible Conversations", "version": app.version})
 
-# Health check
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "Bible Conversations"}
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8009)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8009,
+        workers=int(os.getenv("WEB_CONCURRENCY", 1)),
+        log_level="info"
+    )
\ No newline at end of file
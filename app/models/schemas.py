@@ -51,6 +51,22 @@ class ChatRequest(BaseModel):
         }
 
 
+class ChatBatchRequest(BaseModel):
+    """Request for the batch chat endpoint (several questions answered together)"""
+    questions: List[str] = Field(..., description="User's questions", min_length=1, max_length=10)
+    k: Optional[int] = Field(None, description="Number of chunks to retrieve", ge=1, le=10)
+    include_sources: Optional[bool] = Field(True, description="Include source chunks in response")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "questions": ["What does John 3:16 say?", "What does Psalm 23:1 say?"],
+                "k": 3,
+                "include_sources": False
+            }
+        }
+
+
 class SourceChunk(BaseModel):
     """Source chunk information"""
     content: str
@@ -69,6 +85,12 @@ class ChatResponse(BaseModel):
     message: Optional[str] = None
 
 
+class ChatBatchResponse(BaseModel):
+    """Response from the batch chat endpoint, one result per question in order"""
+    success: bool
+    results: List[ChatResponse]
+
+
 # ============================================================================
 # VOICE/SPEECH SCHEMAS
 # ============================================================================
@@ -91,6 +113,22 @@ class TTSRequest(BaseModel):
         }
 
 
+class ChatStreamRequest(ChatRequest):
+    """Request for the streaming (spoken) chat endpoint"""
+    voice: str = Field("en-US-JennyNeural", description="Voice name for TTS")
+    rate: str = Field("+0%", description="Speech rate adjustment")
+    pitch: str = Field("+0Hz", description="Pitch adjustment")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "question": "What does John 3:16 say?",
+                "k": 3,
+                "voice": "en-US-JennyNeural"
+            }
+        }
+
+
 class VoiceQueryResponse(BaseModel):
     """Response for voice query (includes transcription)"""
     success: bool
@@ -0,0 +1,94 @@
+"""
+Document Parsing
+Loading and splitting of uploads, run in the parse worker processes.
+Spawned workers import this module, so it must not import the embedding
+model (torch) or the vector store (Chroma)
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+from charset_normalizer import from_bytes, from_path
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import (
+    PyPDFium2Loader,
+    TextLoader,
+    Docx2txtLoader
+)
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Text splitting parameters
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Built once per process (each parse worker gets its own at import)
+TEXT_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    length_function=len,
+)
+
+
+def _get_loader_for_file(file_path: str):
+    """Get appropriate document loader based on file extension"""
+    ext = Path(file_path).suffix.lower()
+    
+    if ext == '.pdf':
+        # PDFium (C++) extracts text several times faster than pure-Python pypdf
+        return PyPDFium2Loader(file_path)
+    
+    elif ext in ['.txt', '.md']:
+        # Detect the encoding in one pass instead of trial-loading the file
+        best_match = from_path(file_path).best()
+        encoding = best_match.encoding if best_match else 'utf-8'
+        logger.debug("Detected encoding: %s", encoding)
+        return TextLoader(file_path, encoding=encoding)
+    
+    elif ext == '.docx':
+        return Docx2txtLoader(file_path)
+    
+    else:
+        raise ValueError(f"Unsupported file type: {ext}. Supported: PDF, TXT, MD, DOCX")
+
+
+def load_and_split(file_path: str, upload_metadata: Dict) -> List[Document]:
+    """
+    Load a file and split it into chunks tagged with upload_metadata
+    Runs in a worker process - PDF parsing and splitting are CPU-bound and hold the GIL
+    """
+    loader = _get_loader_for_file(file_path)
+    logger.debug("Using loader: %s", type(loader).__name__)
+    
+    documents = loader.load()
+    logger.debug("Loaded %d document(s)", len(documents))
+    
+    return _split_documents(documents, upload_metadata)
+
+
+def decode_and_split(content: bytes, upload_metadata: Dict) -> List[Document]:
+    """
+    Decode an in-memory text upload and split it into chunks
+    Runs in a worker process, like load_and_split()
+    """
+    best_match = from_bytes(content).best()
+    text = str(best_match) if best_match else content.decode('utf-8')
+    logger.debug("Decoded %s as %s", upload_metadata['source'], best_match.encoding if best_match else 'utf-8')
+    
+    return _split_documents([Document(page_content=text)], upload_metadata)
+
+
+def _split_documents(documents: List[Document], upload_metadata: Dict) -> List[Document]:
+    """Split loaded documents into chunks and tag each chunk with upload_metadata"""
+    if not documents:
+        raise ValueError("No content could be extracted from the file")
+    
+    chunks = TEXT_SPLITTER.split_documents(documents)
+    logger.debug("Split into %d chunks", len(chunks))
+    
+    for chunk in chunks:
+        chunk.metadata.update(upload_metadata)
+    
+    return chunks
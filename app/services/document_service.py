@@ -3,24 +3,70 @@ Document Processing Service (Translation-Aware)
 Handles document upload, parsing, and storage in specific translation collections
 """
 
+import asyncio
+import hashlib
+import logging
+import multiprocessing
 import os
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
-from fastapi import UploadFile
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    Docx2txtLoader
-)
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+
+from langchain_core.documents import Document
 
 from app.core.config import get_settings
+from app.services.document_parsing import decode_and_split, load_and_split
+from app.services.embeddings import get_embeddings
+from app.services.vector_store import forget_dense_index, get_vectorstore
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Uploads are copied to disk in pieces of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+MAX_UPLOAD_BYTES = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+MAX_BATCH_UPLOAD_BYTES = settings.MAX_BATCH_UPLOAD_SIZE_MB * 1024 * 1024
+
+SUPPORTED_EXTENSIONS = frozenset({'.pdf', '.txt', '.md', '.docx'})
+
+# Plain-text formats are decoded in memory; PDF/DOCX parsers need a file on disk
+IN_MEMORY_EXTENSIONS = frozenset({'.txt', '.md'})
+
+# Chunks embedded and written per collection.add() call
+WRITE_BATCH_SIZE = 1000
+
+
+def _chunk_id(translation_id: str, text: str) -> str:
+    """Stable Chroma ID for a chunk of text within a translation"""
+    return f"{translation_id}:{hashlib.blake2s(text.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+# Process pool for parsing uploads (created on first use)
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Get or create the document parsing process pool"""
+    global _parse_pool
+    if _parse_pool is None:
+        # spawn, not fork: the parent has torch / Chroma threads running
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=settings.PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _parse_pool
+
+def shutdown_parse_pool():
+    """Stop the parsing worker processes (called on application shutdown)"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
 
 
 class DocumentService:
@@ -28,57 +74,175 @@ class DocumentService:
     
     def __init__(self):
         """Initialize document service"""
-        print("Initializing Document Service...")
+        logger.info("Initializing Document Service...")
         
-        # Initialize embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        
-        # Text splitter for chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        # Shared embedding model (loaded once per process)
+        self.embeddings = get_embeddings()
         
         # Base paths
         self.chroma_base_path = Path(settings.CHROMA_DB_PATH)
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         
-        print("✓ Document Service initialized")
+        logger.info("✓ Document Service initialized")
     
     
-    def _get_loader_for_file(self, file_path: str):
-        """Get appropriate document loader based on file extension"""
-        ext = Path(file_path).suffix.lower()
+    async def _read_upload(self, file: UploadFile) -> bytes:
+        """
+        Read a (text) upload into memory in chunks
         
-        if ext == '.pdf':
-            return PyPDFLoader(file_path)
+        Raises:
+            HTTPException(413): if the upload exceeds MAX_UPLOAD_SIZE_MB
+        """
+        content = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            content += chunk
+            if len(content) > MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB} MB"
+                )
+        return bytes(content)
+    
+    
+    async def _save_upload(self, file: UploadFile, suffix: str) -> str:
+        """
+        Copy an upload to a temporary file in chunks without blocking the event loop
+        
+        Raises:
+            HTTPException(413): if the upload exceeds MAX_UPLOAD_SIZE_MB
+        """
+        fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, 'wb') as out:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_UPLOAD_BYTES:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB} MB"
+                        )
+                    await out.write(chunk)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        
+        return temp_path
+    
+    
+    async def _parse_upload(self, file: UploadFile, translation_id: str) -> List[Document]:
+        """
+        Parse an upload into chunks tagged with its source and translation
+        Parsing and chunking are CPU-bound, so they run in a worker process
+        """
+        temp_path = None
         
-        elif ext in ['.txt', '.md']:
-            # Try multiple encodings for text files
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
+        try:
+            # Reject unsupported types before anything touches the disk
+            suffix = Path(file.filename).suffix
+            if suffix.lower() not in SUPPORTED_EXTENSIONS:
+                raise ValueError(f"Unsupported file type: {suffix.lower()}. Supported: PDF, TXT, MD, DOCX")
+            
+            upload_metadata = {'source': file.filename, 'translation_id': translation_id}
+            loop = asyncio.get_running_loop()
+            
+            if suffix.lower() in IN_MEMORY_EXTENSIONS:
+                # Text needs no temp file - decode and split straight from memory
+                content = await self._read_upload(file)
+                return await loop.run_in_executor(
+                    get_parse_pool(), decode_and_split, content, upload_metadata
+                )
+            
+            # Stream uploaded file to disk, rejecting oversize files early
+            temp_path = await self._save_upload(file, suffix)
+            logger.debug("Saved to temp path: %s", temp_path)
+            
+            return await loop.run_in_executor(
+                get_parse_pool(), load_and_split, temp_path, upload_metadata
+            )
+            
+        finally:
+            # Clean up temporary file
+            if temp_path:
                 try:
-                    loader = TextLoader(file_path, encoding=encoding)
-                    # Test load to verify encoding works
-                    loader.load()
-                    return TextLoader(file_path, encoding=encoding)
-                except Exception as e:
-                    print(f"Failed with {encoding}: {e}")
+                    await aiofiles.os.remove(temp_path)
+                except FileNotFoundError:
+                    pass
+    
+    
+    def _store_chunks(self, chunks: List[Document], translation_id: str) -> Tuple[int, int]:
+        """
+        Embed (already tagged) chunks into a translation's collection
+        Runs in this process - the translation's Chroma index lives here
+        
+        Returns:
+            (chunks added, total chunks now in the translation)
+        """
+        if not chunks:
+            raise ValueError("Document splitting produced no chunks")
+        
+        # Store in translation-specific ChromaDB collection
+        translation_path = self.chroma_base_path / translation_id
+        translation_path.mkdir(parents=True, exist_ok=True)
+        
+        logger.debug("Storing in: %s", translation_path)
+        
+        vectorstore = get_vectorstore(translation_id)
+        
+        # Content-addressed IDs: re-uploading the same text is skipped instead of
+        # being embedded and stored a second time
+        unique_chunks = {_chunk_id(translation_id, chunk.page_content): chunk for chunk in chunks}
+        chunk_ids = list(unique_chunks)
+        
+        # Embed in large slices; each slice's Chroma write runs on a writer thread
+        # while the next slice is being embedded
+        collection = vectorstore._collection
+        num_batches = (len(chunk_ids) - 1) // WRITE_BATCH_SIZE + 1
+        num_added = 0
+        
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending_write = None
+            
+            for i in range(0, len(chunk_ids), WRITE_BATCH_SIZE):
+                stored = set(collection.get(ids=chunk_ids[i:i + WRITE_BATCH_SIZE], include=[])['ids'])
+                batch_ids = [chunk_id for chunk_id in chunk_ids[i:i + WRITE_BATCH_SIZE] if chunk_id not in stored]
+                if not batch_ids:
                     continue
+                
+                batch = [unique_chunks[chunk_id] for chunk_id in batch_ids]
+                texts = [chunk.page_content for chunk in batch]
+                embeddings = self.embeddings.embed_documents(texts)
+                
+                if pending_write:
+                    pending_write.result()
+                
+                pending_write = writer.submit(
+                    collection.add,
+                    ids=batch_ids,
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=[chunk.metadata for chunk in batch]
+                )
+                num_added += len(batch_ids)
+                logger.debug("Embedded batch %d/%d", i // WRITE_BATCH_SIZE + 1, num_batches)
             
-            # If all encodings fail, raise error
-            raise ValueError(f"Could not load text file with any encoding")
+            if pending_write:
+                pending_write.result()
+        
+        # Get total chunks in this translation
+        total_chunks = collection.count()
         
-        elif ext == '.docx':
-            return Docx2txtLoader(file_path)
+        # Searches rebuild the in-memory index with the new chunks
+        if num_added:
+            forget_dense_index(translation_id)
         
-        else:
-            raise ValueError(f"Unsupported file type: {ext}. Supported: PDF, TXT, MD, DOCX")
+        logger.info("✓ %d chunks added to %s (%d already stored, %d total)",
+                    num_added, translation_id, len(chunks) - num_added, total_chunks)
+        
+        return num_added, total_chunks
     
     
     async def process_document(self, file: UploadFile, translation_id: str) -> Dict:
@@ -92,81 +256,29 @@ class DocumentService:
         Returns:
             Dictionary with success status and statistics
         """
-        temp_path = None
-        
         try:
-            print(f"Processing file: {file.filename} for translation: {translation_id}")
-            
-            # Save uploaded file temporarily
-            suffix = Path(file.filename).suffix
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                content = await file.read()
-                tmp.write(content)
-                temp_path = tmp.name
-            
-            print(f"Saved to temp path: {temp_path}")
-            
-            # Load document
-            loader = self._get_loader_for_file(temp_path)
-            print(f"Using loader: {type(loader).__name__}")
-            
-            documents = loader.load()
-            print(f"Loaded {len(documents)} document(s)")
-            
-            if not documents:
-                raise ValueError("No content could be extracted from the file")
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_documents(documents)
-            print(f"Split into {len(chunks)} chunks")
-            
-            if not chunks:
-                raise ValueError("Document splitting produced no chunks")
-            
-            # Add metadata
-            for chunk in chunks:
-                chunk.metadata['source'] = file.filename
-                chunk.metadata['translation_id'] = translation_id
+            logger.debug("Processing file: %s for translation: %s", file.filename, translation_id)
             
-            # Store in translation-specific ChromaDB collection
-            translation_path = self.chroma_base_path / translation_id
-            translation_path.mkdir(parents=True, exist_ok=True)
+            chunks = await self._parse_upload(file, translation_id)
             
-            print(f"Storing in: {translation_path}")
-            
-            vectorstore = Chroma(
-                persist_directory=str(translation_path),
-                embedding_function=self.embeddings
+            # Embedding and storage - keep them off the event loop
+            num_chunks, total_chunks = await asyncio.to_thread(
+                self._store_chunks, chunks, translation_id
             )
             
-            # Add documents in batches to avoid memory issues
-            batch_size = 100
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                vectorstore.add_documents(batch)
-                print(f"Added batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
-            
-            # Get total chunks in this translation
-            collection = vectorstore._collection
-            total_chunks = collection.count()
-            
-            print(f"✓ Processed {file.filename}: {len(chunks)} chunks added to {translation_id}")
-            print(f"Total chunks in {translation_id}: {total_chunks}")
-            
             return {
                 'success': True,
                 'filename': file.filename,
                 'translation_id': translation_id,
-                'num_chunks': len(chunks),
+                'num_chunks': num_chunks,
                 'total_chunks': total_chunks,
-                'message': f'Successfully added {len(chunks)} chunks to {translation_id}'
+                'message': f'Successfully added {num_chunks} chunks to {translation_id}'
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"Error processing document: {str(e)}")
-            print(f"Full traceback:\n{error_details}")
+            logger.exception("Error processing document %s", file.filename)
             
             return {
                 'success': False,
@@ -175,24 +287,82 @@ class DocumentService:
                 'error': str(e),
                 'message': f'Failed to process document: {str(e)}'
             }
-            
-        finally:
-            # Clean up temporary file
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+    
+    
+    async def process_documents(self, files: List[UploadFile], translation_id: str) -> Dict:
+        """
+        Process several documents into one translation collection
+        Files are parsed in parallel across the worker pool, then all of their
+        chunks are embedded and stored in a single pass
+        
+        Args:
+            files: Uploaded files
+            translation_id: ID of the translation to store in
+        
+        Returns:
+            Dictionary with overall success status, statistics and per-file results
+        """
+        parsed = await asyncio.gather(
+            *(self._parse_upload(file, translation_id) for file in files),
+            return_exceptions=True
+        )
+        
+        chunks: List[Document] = []
+        file_results = []
+        
+        for file, outcome in zip(files, parsed):
+            if isinstance(outcome, BaseException):
+                error = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+                logger.error("Error processing document %s: %s", file.filename, error)
+                file_results.append({
+                    'success': False,
+                    'filename': file.filename,
+                    'error': error
+                })
+            else:
+                chunks.extend(outcome)
+                file_results.append({
+                    'success': True,
+                    'filename': file.filename,
+                    'num_chunks': len(outcome)
+                })
+        
+        if not chunks:
+            return {
+                'success': False,
+                'translation_id': translation_id,
+                'files': file_results,
+                'message': 'No documents could be processed'
+            }
+        
+        try:
+            num_chunks, total_chunks = await asyncio.to_thread(
+                self._store_chunks, chunks, translation_id
+            )
+        except Exception as e:
+            logger.exception("Error storing documents for %s", translation_id)
+            return {
+                'success': False,
+                'translation_id': translation_id,
+                'files': file_results,
+                'error': str(e),
+                'message': f'Failed to store documents: {str(e)}'
+            }
+        
+        num_processed = sum(1 for result in file_results if result['success'])
+        
+        return {
+            'success': True,
+            'translation_id': translation_id,
+            'files': file_results,
+            'num_chunks': num_chunks,
+            'total_chunks': total_chunks,
+            'message': f'Successfully added {num_chunks} chunks from {num_processed}/{len(files)} files to {translation_id}'
+        }
 
 
 # Singleton instance
-_document_service = None
-
+@lru_cache()
 def get_document_service() -> DocumentService:
     """Get or create document service instance"""
-    global _document_service
-    
-    if _document_service is None:
-        _document_service = DocumentService()
-    
-    return _document_service
+    return DocumentService()
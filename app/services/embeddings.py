@@ -0,0 +1,144 @@
+"""
+Embedding Model Factory
+Builds the HuggingFace sentence-transformer used for indexing and retrieval
+on the fastest available device, and shares one instance per process
+"""
+
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+import torch
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from app.core.config import get_settings
+from app.services.query_cache import CachedEmbeddings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Encode batch size per device - GPUs want much larger batches than the CPU
+DEVICE_BATCH_SIZES = {
+    'cuda': 512,
+    'mps': 128,
+}
+
+
+def detect_device() -> str:
+    """Pick the embedding device: EMBEDDING_DEVICE if set, else CUDA, then MPS, then CPU"""
+    if settings.EMBEDDING_DEVICE:
+        return settings.EMBEDDING_DEVICE
+    if torch.cuda.is_available():
+        return 'cuda'
+    if torch.backends.mps.is_available():
+        return 'mps'
+    return 'cpu'
+
+
+def configure_torch_threads():
+    """
+    Size torch's CPU thread pools - must run before the first torch op creates them
+    Intra-op threads default to this worker's share of the cores; inter-op
+    parallelism is off since each encode is a single sequential graph
+    """
+    num_threads = settings.TORCH_NUM_THREADS
+    if not num_threads:
+        workers = int(os.getenv("WEB_CONCURRENCY", 1))
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+    
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Inter-op pool already started (torch was used before this call)
+        pass
+
+
+def create_embeddings() -> HuggingFaceEmbeddings:
+    """
+    Create the embedding model (FP16 on GPU, FP32 on CPU)
+    On CPU, EMBEDDING_BACKEND=onnx / openvino runs an exported (optionally int8) model instead
+    """
+    configure_torch_threads()
+    device = detect_device()
+    
+    if device == 'cpu' and settings.EMBEDDING_BACKEND != 'torch':
+        model_kwargs = {'device': device, 'backend': settings.EMBEDDING_BACKEND}
+        if settings.EMBEDDING_MODEL_FILE:
+            model_kwargs['model_kwargs'] = {'file_name': settings.EMBEDDING_MODEL_FILE}
+        precision = f"{settings.EMBEDDING_BACKEND} {settings.EMBEDDING_MODEL_FILE or 'default export'}"
+    else:
+        dtype = torch.float32 if device == 'cpu' else torch.float16
+        model_kwargs = {'device': device, 'model_kwargs': {'torch_dtype': dtype}}
+        precision = str(dtype)
+    
+    embeddings = HuggingFaceEmbeddings(
+        model_name=settings.EMBEDDING_MODEL,
+        model_kwargs=model_kwargs,
+        encode_kwargs={
+            'normalize_embeddings': True,
+            'batch_size': DEVICE_BATCH_SIZES.get(device, settings.EMBEDDING_BATCH_SIZE)
+        }
+    )
+    logger.info("✓ Embedding model on %s (%s)", device, precision)
+    
+    # Run one small batch so the first real query doesn't pay for lazy
+    # weight/kernel initialization
+    embeddings.embed_documents(["warmup"] * 8)
+    
+    return embeddings
+
+
+@lru_cache()
+def get_embeddings() -> CachedEmbeddings:
+    """
+    Get the process-wide embedding model, shared by indexing and retrieval
+    Query embeddings are memoized; document embeddings pass straight through
+    """
+    return CachedEmbeddings(create_embeddings(), max_size=settings.EMBEDDING_CACHE_SIZE)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent query embeddings into one model call
+    Whatever questions queue up while a batch is being encoded are encoded
+    together next, so a lone request never waits for company
+    """
+    
+    def __init__(self, embeddings: CachedEmbeddings, max_batch: int = 32):
+        self.embeddings = embeddings
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed one question, batched with any other questions waiting"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            try:
+                # sentence-transformers sorts each batch by length before padding
+                vectors = await asyncio.to_thread(
+                    self.embeddings.embed_queries, [text for text, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), vector in zip(batch, vectors):
+                    if not future.done():
+                        future.set_result(vector)
@@ -0,0 +1,193 @@
+"""
+Query Caches
+In-process caches for question embeddings and generated answers
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _text_key(text: str) -> str:
+    """Content-addressed key for a piece of text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivial differences share a cache entry"""
+    return " ".join(question.lower().split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that memoizes embed_query() in an LRU
+    Document embeddings pass straight through - they are only computed at upload time
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = 1024):
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, running the model once for all cache misses"""
+        keys = [_text_key(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    vectors[i] = vector
+
+        misses = [i for i, vector in enumerate(vectors) if vector is None]
+        if misses:
+            computed = self.embeddings.embed_documents([texts[i] for i in misses])
+
+            with self._lock:
+                for i, vector in zip(misses, computed):
+                    vectors[i] = vector
+                    self._cache[keys[i]] = vector
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+
+        return vectors
+
+
+class RetrievalCache:
+    """
+    LRU of retrieved chunks keyed on (normalized question, translation_id, k)
+    Outlives answer-cache expiry, so a repeat question re-runs only the LLM
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question: str, translation_id: str, k: int) -> Optional[List[Dict]]:
+        """Return a copy of the cached chunks for this question, or None"""
+        key = (normalize_question(question), translation_id, k)
+
+        with self._lock:
+            chunks = self._entries.get(key)
+            if chunks is None:
+                return None
+            self._entries.move_to_end(key)
+
+        return [dict(chunk) for chunk in chunks]
+
+    def put(self, question: str, translation_id: str, k: int, chunks: List[Dict]):
+        """Store retrieved chunks"""
+        key = (normalize_question(question), translation_id, k)
+
+        with self._lock:
+            self._entries[key] = [dict(chunk) for chunk in chunks]
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, translation_id: str):
+        """Drop every cached retrieval for a translation (e.g. after new uploads)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == translation_id]:
+                del self._entries[key]
+
+
+class AnswerCache:
+    """
+    Cache of generated answers keyed on (question, translation_id, k)
+    Exact (normalized) questions hit directly; otherwise a cached answer is reused
+    when its question embedding has cosine similarity >= threshold and it was
+    asked about the same verse reference (or none) - embeddings barely tell
+    "John 3:16" from "John 3:17"
+    Answers expire ttl seconds after they were stored
+    """
+
+    def __init__(self, max_size: int = 256, threshold: float = 0.97, ttl: float = 300):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question: str, vector: List[float], translation_id: str,
+            k: Optional[int], reference: Optional[str] = None) -> Optional[Dict]:
+        """Return a copy of a cached answer for this question, or None"""
+        key = (normalize_question(question), translation_id, k)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry['expires'] > now:
+                    self._entries.move_to_end(key)
+                    return dict(entry['result'])
+                del self._entries[key]
+
+            if self.threshold >= 1.0:
+                return None
+
+            candidates = [
+                (entry_key, entry) for entry_key, entry in self._entries.items()
+                if entry_key[1] == translation_id and entry_key[2] == k
+                and entry['reference'] == reference and entry['expires'] > now
+            ]
+
+        if not candidates:
+            return None
+
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        matrix = np.array([entry['vector'] for _, entry in candidates])
+        scores = matrix @ np.asarray(vector)
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.threshold:
+            return None
+
+        logger.debug("✓ Semantic answer cache hit (similarity %.3f)", scores[best])
+        return dict(candidates[best][1]['result'])
+
+    def put(self, question: str, vector: List[float], translation_id: str,
+            k: Optional[int], result: Dict, reference: Optional[str] = None):
+        """Store an answer (reference: the verse reference the question asks about, if any)"""
+        key = (normalize_question(question), translation_id, k)
+
+        with self._lock:
+            self._entries[key] = {
+                'vector': vector,
+                'reference': reference,
+                'result': result,
+                'expires': time.monotonic() + self.ttl
+            }
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, translation_id: str):
+        """Drop every cached answer for a translation (e.g. after new uploads)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == translation_id]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._entries.clear()
@@ -4,21 +4,162 @@ Handles retrieval and generation for Bible study questions across multiple trans
 UPDATED: Completely unbiased, text-only responses + Smart Translation Comparison
 """
 
-from typing import List, Dict, Optional
-import traceback
-import json
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+import asyncio
+import logging
 import os
 import re
 import shutil
+import threading
+import uuid
+from functools import lru_cache
 from pathlib import Path
 
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from groq import Groq
+import orjson
+from langchain_core.documents import Document
 
 from app.core.config import get_settings
+from app.services.vector_store import (
+    get_vectorstore, forget_vectorstore, get_dense_index, forget_dense_index, semantic_search
+)
+from app.core.clients import get_async_groq_client
+from app.services.embeddings import EmbeddingBatcher, get_embeddings
+from app.services.query_cache import AnswerCache, RetrievalCache
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# RAG instructions, sent as the system message - fully static (identical bytes
+# on every call, whatever the translation), so Groq can reuse the cached prompt prefix
+RAG_SYSTEM_PROMPT = """You are a Bible reference assistant. Your role is to provide ONLY what is written in the biblical text, without interpretation, opinion, or theological commentary.
+
+The translation the user is reading from, the Bible text, and the user's question follow below.
+
+STRICT INSTRUCTIONS:
+1. ONLY quote or paraphrase what is explicitly written in the provided Bible text below
+2. DO NOT add theological interpretations, doctrinal explanations, or personal opinions
+3. DO NOT explain what verses "mean" - only state what they literally say
+4. If asked for interpretation or meaning, respond: "I provide only what the text says. For interpretation, please consult a pastor, theologian, or Bible study guide."
+5. If comparing translations, ONLY note the different wording used - do not explain which is "better" or "more accurate"
+6. If the text doesn't contain the answer, say that you don't see that specific information in the passages you have access to, naming the translation the user is reading from (given in the user message)
+7. When citing passages, use natural verse ranges (e.g., "John 3:16-18" instead of "verse 16, verse 17, verse 18")
+8. For consecutive verses, introduce ONCE with the verse range at the beginning (e.g., "John 3 verses 16 to 18 say:") then read the text smoothly without repeating "verse 16", "verse 17" for each one
+9. Read the biblical text naturally and conversationally - avoid robotic verse-by-verse announcements
+10. If asked about context (historical, cultural), only provide it if it's explicitly mentioned in the biblical text itself"""
+
+# User message, split around the retrieved context so the context is joined
+# straight into the final string
+RAG_PROMPT_HEAD = """The user is currently reading from: {translation_name}
+
+BIBLE TEXT FROM {translation_name}:
+"""
+RAG_PROMPT_TAIL = """
+
+USER'S QUESTION:
+{query}
+
+YOUR RESPONSE (Bible text only, no interpretation, natural verse ranges):"""
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+TRANSLATION_ID_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+
+# Patterns for Bible references (in order of specificity), compiled once
+VERSE_REFERENCE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        # "John 3:16" or "John 3:16-18" (standard format with colon)
+        r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(\d+):(\d+)(?:-(\d+))?',
+
+        # "John 3 verse 16" or "John chapter 3 verse 16" (natural language)
+        r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(?:chapter\s+)?(\d+)\s+verse\s+(\d+)(?:\s+to\s+(\d+))?',
+
+        # "John 3 verses 16 to 18" (plural verses)
+        r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(?:chapter\s+)?(\d+)\s+verses\s+(\d+)(?:\s+to\s+)?(\d+)?',
+
+        # "John 3 16" (space-separated)
+        r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(\d+)\s+(\d+)(?:-(\d+))?(?:\s|$)',
+
+        # "John 10" (whole chapter)
+        r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(?:chapter\s+)?(\d+)(?:\s|$)(?![\d:])',
+    )
+]
+
+# Comparison prompts - table layout instructions for the LLM, filled in per request
+COMPARISON_PROMPT = """You are comparing Bible translations. You MUST provide your response in this EXACT format:
+
+[SPOKEN]: Brief summary here
+
+[TABLE]: HTML table here
+
+USER'S QUESTION:
+{question}
+
+BIBLE TEXT FROM EACH TRANSLATION:
+{context}
+
+PART 1 - SPOKEN SUMMARY:
+Start with "[SPOKEN]:" then write a brief 2-3 sentence summary.
+If some translations don't have the passage, mention this in your summary.
+
+PART 2 - HTML TABLE:
+Start with "[TABLE]:" then create an HTML table showing ALL {num_translations} translations side-by-side.
+
+Requirements:
+- Use <table class="comparison-table">
+- First column header: "Passage"
+- Column headers for ALL translations: {translation_names}
+- If a translation doesn't have the passage, put "Not found" in that cell
+- Each row shows: verse reference | text from each translation
+
+CRITICAL: You MUST include columns for ALL {num_translations} translations: {translation_names}
+
+YOUR RESPONSE (must have both parts and all {num_translations} translation columns):"""
+
+TOPICAL_COMPARISON_PROMPT = """You are comparing Bible translations for a topical question. You MUST provide your response in this EXACT format:
+
+[SPOKEN]: Brief summary here
+
+[TABLE]: HTML table here
+
+USER'S QUESTION:
+{question}
+
+RELEVANT PASSAGES FROM EACH TRANSLATION:
+{context}
+
+PART 1 - SPOKEN SUMMARY:
+Start with "[SPOKEN]:" then write a 2-3 sentence summary explaining how the translations address this topic.
+
+PART 2 - HTML TABLE:
+Start with "[TABLE]:" then create an HTML table with these specifications:
+- Use <table class="comparison-table">
+- First column header: "Passage"
+- Other column headers: {translation_names}
+- One row per verse reference
+- Show text from each translation (or "Not found")
+
+Example structure:
+[TABLE]:
+<table class="comparison-table">
+<tr>
+<th>Passage</th>
+<th>{first_name}</th>
+<th>{second_name}</th>
+{third_header}
+</tr>
+<tr>
+<td>John 3:16</td>
+<td>For God so loved...</td>
+<td>For God so loved...</td>
+{third_cell}
+</tr>
+</table>
+
+YOUR RESPONSE (must have both [SPOKEN]: and [TABLE]:):"""
+
+# Splits a comparison response into its [SPOKEN]: summary and [TABLE]: HTML
+COMPARISON_RESPONSE_PATTERN = re.compile(
+    r"\[SPOKEN\]:\s*(?P<spoken>.*?)\s*\[TABLE\]:\s*(?P<table>.*?)\s*\Z", re.DOTALL
+)
 
 
 class RAGService:
@@ -26,19 +167,33 @@ class RAGService:
     
     def __init__(self):
         """Initialize the RAG service"""
-        print("Initializing Multi-Translation Bible Study RAG Service...")
+        logger.info("Initializing Multi-Translation Bible Study RAG Service...")
         
-        # HuggingFace embeddings (FREE, runs locally)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        # HuggingFace embeddings (FREE, runs locally) - shared with indexing,
+        # question embeddings are memoized so repeat questions skip the model
+        self.embeddings = get_embeddings()
+        # Concurrent async questions are embedded together
+        self.query_batcher = EmbeddingBatcher(self.embeddings)
+        logger.info("✓ Embeddings initialized: %s", settings.EMBEDDING_MODEL)
+        
+        # Answers for repeat / near-duplicate questions
+        self.answer_cache = AnswerCache(
+            max_size=settings.ANSWER_CACHE_SIZE,
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            ttl=settings.ANSWER_CACHE_TTL_SECONDS
+        )
+        # Comparison results, keyed on the comma-joined translation IDs
+        self.comparison_cache = AnswerCache(
+            max_size=settings.ANSWER_CACHE_SIZE,
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            ttl=settings.ANSWER_CACHE_TTL_SECONDS
         )
-        print(f"✓ Embeddings initialized: {settings.EMBEDDING_MODEL}")
+        # Retrieved chunks per question, so an expired answer skips the search
+        self.retrieval_cache = RetrievalCache(max_size=settings.RETRIEVAL_CACHE_SIZE)
         
-        # Groq LLM (FREE!) - Direct SDK, no OpenAI wrapper
-        self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
-        print(f"✓ LLM initialized: {settings.CHAT_MODEL} (Groq - FREE)")
+        # Groq LLM (FREE!) - Direct SDK, no OpenAI wrapper, shared connection pool
+        self.async_groq_client = get_async_groq_client()
+        logger.info("✓ LLM initialized: %s (Groq - FREE)", settings.CHAT_MODEL)
         
         # Translation management
         self.chroma_base_path = Path(settings.CHROMA_DB_PATH)
@@ -46,33 +201,91 @@ class RAGService:
         self.current_translation = None
         self.vectorstore = None
         
+        # Parsed translations.json, reused until the file's mtime changes
+        # (another worker process may have rewritten it)
+        self._metadata_cache: Dict = {}
+        self._metadata_mtime: Optional[float] = None
+        # Serializes read-modify-write updates of translations.json
+        self._metadata_lock = threading.RLock()
+        
         # Ensure base directory exists
         self.chroma_base_path.mkdir(parents=True, exist_ok=True)
         
+        # Deleted translations are moved here and removed in the background;
+        # anything left over from a previous run is cleared now
+        self.trash_path = self.chroma_base_path / ".trash"
+        self.trash_path.mkdir(exist_ok=True)
+        for leftover in self.trash_path.iterdir():
+            self._remove_in_background(leftover)
+        
         # Initialize translations metadata file if it doesn't exist
         if not self.translations_file.exists():
             self._save_translations_metadata({})
         
-        print(f"✓ Translation system initialized: {self.chroma_base_path}")
+        # Open every translation in the background so the first switch or
+        # question doesn't pay for loading its collection from disk
+        threading.Thread(target=self._preload_translations, daemon=True).start()
+        
+        logger.info("✓ Translation system initialized: %s", self.chroma_base_path)
+    
+    
+    def _preload_translations(self):
+        """Open each translation's vector store and build its dense index"""
+        for translation_id in list(self._load_translations_metadata()):
+            try:
+                get_dense_index(translation_id)
+            except Exception as e:
+                logger.warning("Could not preload translation %s: %s", translation_id, e)
+        
+        logger.debug("✓ Translations preloaded")
     
     
     def _load_translations_metadata(self) -> Dict:
-        """Load translations metadata from JSON file"""
+        """Load translations metadata from JSON file (cached until the file changes)"""
         try:
-            with open(self.translations_file, 'r') as f:
-                return json.load(f)
+            mtime = os.stat(self.translations_file).st_mtime
+            if mtime == self._metadata_mtime:
+                return self._metadata_cache
+            
+            with open(self.translations_file, 'rb') as f:
+                metadata = orjson.loads(f.read())
+            
+            # Changed on disk by another worker process - drop what this process
+            # cached for translations whose chunks were added or removed
+            for translation_id, info in self._metadata_cache.items():
+                if metadata.get(translation_id, {}).get('chunks') != info.get('chunks'):
+                    if translation_id not in metadata:
+                        forget_vectorstore(translation_id)
+                    else:
+                        forget_dense_index(translation_id)
+                    self._invalidate_translation_caches(translation_id)
+            
+            self._metadata_cache = metadata
+            self._metadata_mtime = mtime
+            return self._metadata_cache
         except Exception as e:
-            print(f"Error loading translations metadata: {e}")
+            logger.error("Error loading translations metadata: %s", e)
             return {}
     
     
     def _save_translations_metadata(self, metadata: Dict):
-        """Save translations metadata to JSON file"""
+        """Save translations metadata to JSON file (atomically - readers never see a partial file)"""
         try:
-            with open(self.translations_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            temp_file = self.translations_file.with_suffix('.json.tmp')
+            with open(temp_file, 'wb') as f:
+                f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+            os.replace(temp_file, self.translations_file)
+            self._metadata_cache = metadata
+            self._metadata_mtime = os.stat(self.translations_file).st_mtime
         except Exception as e:
-            print(f"Error saving translations metadata: {e}")
+            # Force a re-read so unsaved changes don't linger in the cache
+            self._metadata_mtime = None
+            logger.error("Error saving translations metadata: %s", e)
+    
+    
+    def get_translation(self, translation_id: str) -> Optional[Dict]:
+        """Get the metadata entry for one translation, or None if it doesn't exist"""
+        return self._load_translations_metadata().get(translation_id)
     
     
     def get_available_translations(self) -> List[Dict]:
@@ -95,36 +308,38 @@ class RAGService:
     def create_translation(self, translation_id: str, name: str, description: str = "") -> Dict:
         """Create a new translation collection"""
         try:
-            # Validate translation_id (alphanumeric and underscores only)
-            if not translation_id.replace('_', '').isalnum():
+            # Validate translation_id (ASCII letters, digits and underscores only -
+            # it becomes a directory name)
+            if not TRANSLATION_ID_PATTERN.fullmatch(translation_id):
                 return {
                     'success': False,
                     'message': 'Translation ID must contain only letters, numbers, and underscores'
                 }
             
-            # Check if translation already exists
-            metadata = self._load_translations_metadata()
-            if translation_id in metadata:
-                return {
-                    'success': False,
-                    'message': f'Translation "{translation_id}" already exists'
+            with self._metadata_lock:
+                # Check if translation already exists
+                metadata = self._load_translations_metadata()
+                if translation_id in metadata:
+                    return {
+                        'success': False,
+                        'message': f'Translation "{translation_id}" already exists'
+                    }
+                
+                # Create directory for this translation
+                translation_path = self.chroma_base_path / translation_id
+                translation_path.mkdir(parents=True, exist_ok=True)
+                
+                # Add to metadata
+                from datetime import datetime
+                metadata[translation_id] = {
+                    'name': name,
+                    'description': description,
+                    'created': datetime.now().isoformat(),
+                    'chunks': 0
                 }
+                self._save_translations_metadata(metadata)
             
-            # Create directory for this translation
-            translation_path = self.chroma_base_path / translation_id
-            translation_path.mkdir(parents=True, exist_ok=True)
-            
-            # Add to metadata
-            from datetime import datetime
-            metadata[translation_id] = {
-                'name': name,
-                'description': description,
-                'created': datetime.now().isoformat(),
-                'chunks': 0
-            }
-            self._save_translations_metadata(metadata)
-            
-            print(f"✓ Created translation: {name} ({translation_id})")
+            logger.info("✓ Created translation: %s (%s)", name, translation_id)
             
             return {
                 'success': True,
@@ -133,7 +348,7 @@ class RAGService:
             }
             
         except Exception as e:
-            print(f"Error creating translation: {e}")
+            logger.error("Error creating translation: %s", e)
             return {
                 'success': False,
                 'message': f'Failed to create translation: {str(e)}'
@@ -143,30 +358,37 @@ class RAGService:
     def delete_translation(self, translation_id: str) -> Dict:
         """Delete a translation and its database"""
         try:
-            # Check if translation exists
-            metadata = self._load_translations_metadata()
-            if translation_id not in metadata:
-                return {
-                    'success': False,
-                    'message': f'Translation "{translation_id}" not found'
-                }
-            
-            # Delete the directory
-            translation_path = self.chroma_base_path / translation_id
-            if translation_path.exists():
-                shutil.rmtree(translation_path)
+            with self._metadata_lock:
+                # Check if translation exists
+                metadata = self._load_translations_metadata()
+                if translation_id not in metadata:
+                    return {
+                        'success': False,
+                        'message': f'Translation "{translation_id}" not found'
+                    }
+                
+                # Move the directory out of the way (a single rename) and delete
+                # its files in the background
+                forget_vectorstore(translation_id)
+                translation_path = self.chroma_base_path / translation_id
+                if translation_path.exists():
+                    trash_path = self.trash_path / f"{translation_id}-{uuid.uuid4().hex}"
+                    os.rename(translation_path, trash_path)
+                    self._remove_in_background(trash_path)
+                
+                # Remove from metadata
+                translation_name = metadata[translation_id].get('name', translation_id)
+                del metadata[translation_id]
+                self._save_translations_metadata(metadata)
             
-            # Remove from metadata
-            translation_name = metadata[translation_id].get('name', translation_id)
-            del metadata[translation_id]
-            self._save_translations_metadata(metadata)
+            self._invalidate_translation_caches(translation_id)
             
             # If this was the current translation, clear it
             if self.current_translation == translation_id:
                 self.current_translation = None
                 self.vectorstore = None
             
-            print(f"✓ Deleted translation: {translation_name} ({translation_id})")
+            logger.info("✓ Deleted translation: %s (%s)", translation_name, translation_id)
             
             return {
                 'success': True,
@@ -174,13 +396,24 @@ class RAGService:
             }
             
         except Exception as e:
-            print(f"Error deleting translation: {e}")
+            logger.error("Error deleting translation: %s", e)
             return {
                 'success': False,
                 'message': f'Failed to delete translation: {str(e)}'
             }
     
     
+    @staticmethod
+    def _remove_in_background(path: Path):
+        """Delete a directory tree on a daemon thread"""
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(path,),
+            kwargs={'ignore_errors': True},
+            daemon=True
+        ).start()
+    
+    
     def switch_translation(self, translation_id: str) -> Dict:
         """Switch to a different Bible translation"""
         try:
@@ -193,17 +426,12 @@ class RAGService:
                 }
             
             # Initialize vector store for this translation
-            translation_path = self.chroma_base_path / translation_id
-            
-            self.vectorstore = Chroma(
-                persist_directory=str(translation_path),
-                embedding_function=self.embeddings
-            )
+            self.vectorstore = get_vectorstore(translation_id)
             
             self.current_translation = translation_id
             translation_name = metadata[translation_id].get('name', translation_id)
             
-            print(f"✓ Switched to translation: {translation_name} ({translation_id})")
+            logger.info("✓ Switched to translation: %s (%s)", translation_name, translation_id)
             
             return {
                 'success': True,
@@ -213,7 +441,7 @@ class RAGService:
             }
             
         except Exception as e:
-            print(f"Error switching translation: {e}")
+            logger.error("Error switching translation: %s", e)
             return {
                 'success': False,
                 'message': f'Failed to switch translation: {str(e)}'
@@ -225,25 +453,40 @@ class RAGService:
         if not self.current_translation:
             return None
         
-        metadata = self._load_translations_metadata()
-        if self.current_translation in metadata:
-            info = metadata[self.current_translation]
-            return {
-                'id': self.current_translation,
-                'name': info.get('name', self.current_translation),
-                'description': info.get('description', ''),
-                'chunks': info.get('chunks', 0)
-            }
+        return self._translation_info(self.current_translation)
+    
+    
+    def _translation_info(self, translation_id: str) -> Optional[Dict]:
+        """Get information about a translation, or None if it doesn't exist"""
+        info = self.get_translation(translation_id)
+        if info is None:
+            return None
         
-        return None
+        return {
+            'id': translation_id,
+            'name': info.get('name', translation_id),
+            'description': info.get('description', ''),
+            'chunks': info.get('chunks', 0)
+        }
     
     
     def update_translation_chunk_count(self, translation_id: str, chunk_count: int):
         """Update the chunk count for a translation"""
-        metadata = self._load_translations_metadata()
-        if translation_id in metadata:
-            metadata[translation_id]['chunks'] = chunk_count
-            self._save_translations_metadata(metadata)
+        with self._metadata_lock:
+            metadata = self._load_translations_metadata()
+            if translation_id in metadata:
+                metadata[translation_id]['chunks'] = chunk_count
+                self._save_translations_metadata(metadata)
+        
+        # New content can change answers for this translation
+        self._invalidate_translation_caches(translation_id)
+    
+    
+    def _invalidate_translation_caches(self, translation_id: str):
+        """Drop cached answers, retrievals and comparisons that may involve a translation"""
+        self.answer_cache.invalidate(translation_id)
+        self.retrieval_cache.invalidate(translation_id)
+        self.comparison_cache.clear()
     
    
     def _extract_verse_reference(self, query: str) -> Optional[Dict[str, any]]:
@@ -255,27 +498,8 @@ class RAGService:
         - "John chapter 3 verse 16" (verbose)
         - "1 John 2:5" (numbered books)
         """
-        
-        # Patterns for Bible references (in order of specificity)
-        patterns = [
-            # "John 3:16" or "John 3:16-18" (standard format with colon)
-            r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(\d+):(\d+)(?:-(\d+))?',
-            
-            # "John 3 verse 16" or "John chapter 3 verse 16" (natural language)
-            r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(?:chapter\s+)?(\d+)\s+verse\s+(\d+)(?:\s+to\s+(\d+))?',
-            
-            # "John 3 verses 16 to 18" (plural verses)
-            r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(?:chapter\s+)?(\d+)\s+verses\s+(\d+)(?:\s+to\s+)?(\d+)?',
-            
-            # "John 3 16" (space-separated)
-            r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(\d+)\s+(\d+)(?:-(\d+))?(?:\s|$)',
-            
-            # "John 10" (whole chapter)
-            r'(\d?\s*[A-Za-z]+(?:\s+[A-Za-z]+)?)\s+(?:chapter\s+)?(\d+)(?:\s|$)(?![\d:])',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+        for pattern in VERSE_REFERENCE_PATTERNS:
+            match = pattern.search(query)
             if match:
                 groups = match.groups()
                 book = groups[0].strip()
@@ -290,11 +514,15 @@ class RAGService:
                     verse_start = 1
                     verse_end = 999  # Get all verses in chapter
                 
-                reference = f"{book} {chapter}:{verse_start}"
-                if verse_end != verse_start and verse_end != 999:
-                    reference += f"-{verse_end}"
+                if verse_end == 999:
+                    # Not "John 10:1" - that would share answer cache entries with verse 1
+                    reference = f"{book} {chapter}"
+                else:
+                    reference = f"{book} {chapter}:{verse_start}"
+                    if verse_end != verse_start:
+                        reference += f"-{verse_end}"
                 
-                print(f"🔍 Extracted verse reference: {reference}")
+                logger.debug("🔍 Extracted verse reference: %s", reference)
                 
                 return {
                     'book': book,
@@ -304,72 +532,74 @@ class RAGService:
                     'reference': reference
                 }
         
-        print(f"⚠️ Could not extract verse reference from: '{query}'")
+        logger.debug("⚠️ Could not extract verse reference from: '%s'", query)
         return None
 
     
-    def _retrieve_relevant_chunks(self, query: str, k: int = None) -> List[Dict]:
-        """Retrieve most relevant Bible chunks - with exact verse matching"""
-        if not self.vectorstore:
-            return []
-        
+    def _question_reference(self, question: str) -> Optional[str]:
+        """Verse reference a question asks about, if any - cached answers are only shared within one"""
+        verse_ref = self._extract_verse_reference(question)
+        return verse_ref['reference'] if verse_ref else None
+    
+    
+    def _retrieve_relevant_chunks(self, query: str, translation_id: str, k: int = None,
+                                  query_vector: Optional[List[float]] = None) -> List[Dict]:
+        """
+        Retrieve most relevant Bible chunks from a translation - with exact verse matching
+        The translation is passed in (not read from current_translation) so a
+        concurrent switch can't change it mid-question.
+        Pass query_vector when the query is already embedded to skip a second embed
+        """
         if k is None:
             k = settings.RETRIEVAL_K
         
+        cached_chunks = self.retrieval_cache.get(query, translation_id, k)
+        if cached_chunks is not None:
+            return cached_chunks
+        
         # Try to extract exact verse reference
         verse_ref = self._extract_verse_reference(query)
+        results = None
         
         if verse_ref:
-            print(f"Searching for exact reference: {verse_ref['reference']}")
+            logger.debug("Searching for exact reference: %s", verse_ref['reference'])
             
-            book_variations = [
+            book_variations = list(dict.fromkeys([
                 verse_ref['book'],
                 f"Gospel of {verse_ref['book']}",
                 f"{verse_ref['book']}'s Gospel",
                 verse_ref['book'].lower(),
                 verse_ref['book'].title(),
-            ]
+            ]))
             
             filtered_results = []
             
-            for book_name in book_variations:
-                try:
-                    # Search with book and chapter filter
-                    results = self.vectorstore.similarity_search(
-                        verse_ref['reference'],
-                        k=k * 5,
-                        filter={
-                            "$and": [
-                                {"book": {"$eq": book_name}},
-                                {"chapter": {"$eq": verse_ref['chapter']}}
-                            ]
-                        }
-                    )
-                    
-                    if results:
-                        print(f"✓ Found {len(results)} matches with book name: {book_name}")
-                        
-                        # CRITICAL FIX: Only include verses that EXACTLY match the range
-                        for doc in results:
-                            doc_verse_start = doc.metadata.get('verse_start', 0)
-                            doc_verse_end = doc.metadata.get('verse_end', doc_verse_start)
-                            
-                            # MUST be within the exact range, no partial overlaps
-                            if (doc_verse_start >= verse_ref['verse_start'] and 
-                                doc_verse_start <= verse_ref['verse_end'] and
-                                doc_verse_end >= verse_ref['verse_start'] and 
-                                doc_verse_end <= verse_ref['verse_end']):
-                                filtered_results.append((doc, 1.0))
-                        
-                        if filtered_results:
-                            break
+            try:
+                # Direct metadata lookup - no embedding or ANN search needed
+                verse_docs = self._fetch_verse_range(
+                    get_vectorstore(translation_id), verse_ref, book_variations, k * 5
+                )
+            except Exception as e:
+                logger.debug("Filter search failed for '%s': %s", verse_ref['reference'], e)
+                verse_docs = []
+            
+            if verse_docs:
+                logger.debug("✓ Found %d matches in %s %s", len(verse_docs), verse_ref['book'], verse_ref['chapter'])
                 
-                except Exception as e:
-                    print(f"Filter search failed for '{book_name}': {e}")
-                    continue
+                # CRITICAL FIX: Only include verses that EXACTLY match the range
+                for doc in verse_docs:
+                    doc_verse_start = doc.metadata.get('verse_start', 0)
+                    doc_verse_end = doc.metadata.get('verse_end', doc_verse_start)
+                    
+                    # MUST be within the exact range, no partial overlaps
+                    if (doc_verse_start >= verse_ref['verse_start'] and 
+                        doc_verse_start <= verse_ref['verse_end'] and
+                        doc_verse_end >= verse_ref['verse_start'] and 
+                        doc_verse_end <= verse_ref['verse_end']):
+                        filtered_results.append((doc, 1.0))
             
             if filtered_results:
-                print(f"✓ Found {len(filtered_results)} exact matches")
+                logger.debug("✓ Found %d exact matches", len(filtered_results))
                 # Sort by verse start AND limit to exact requested verses
                 filtered_results.sort(key=lambda x: x[0].metadata.get('verse_start', 0))
                 
@@ -382,309 +612,451 @@ class RAGService:
                 
                 results = exact_matches[:k] if exact_matches else filtered_results[:k]
             else:
-                print(f"✗ No exact matches found, trying semantic search")
-                results = self.vectorstore.similarity_search_with_score(query, k=k)
+                # Not a real reference (e.g. "about the 10 commandments") or the
+                # translation has no verse metadata - fall through to semantic search
+                logger.debug("✗ No exact matches found, trying semantic search")
         else:
-            print("Using semantic search (no exact reference found)")
-            results = self.vectorstore.similarity_search_with_score(query, k=k)
+            logger.debug("Using semantic search (no exact reference found)")
+        
+        # results stays None unless the exact lookup found verses
+        if results is None:
+            if query_vector is None:
+                query_vector = self.embeddings.embed_query(query)
+            results = semantic_search(translation_id, query_vector, k)
         
+        # Skip repeated passages (e.g. a file uploaded twice before chunk IDs were
+        # content-addressed) so they don't pad the prompt
         retrieved_chunks = []
+        seen_contents = set()
         for item in results:
             if isinstance(item, tuple):
                 doc, score = item
             else:
                 doc, score = item, 1.0
             
+            if doc.page_content in seen_contents:
+                continue
+            seen_contents.add(doc.page_content)
+            
             retrieved_chunks.append({
                 'content': doc.page_content,
                 'score': float(score),
                 'metadata': doc.metadata
             })
         
+        self.retrieval_cache.put(query, translation_id, k, retrieved_chunks)
+        
         return retrieved_chunks
     
     
-    def _build_rag_prompt(self, query: str, retrieved_chunks: List[Dict]) -> str:
-        """Construct prompt with Bible translation context and query - COMPLETELY UNBIASED"""
-        context = "\n\n---\n\n".join([chunk['content'] for chunk in retrieved_chunks])
+    def _build_rag_prompts(self, query: str, retrieved_chunks: List[Dict],
+                           translation: Optional[Dict]) -> Tuple[str, str]:
+        """
+        Construct the system prompt and the user prompt (Bible translation context
+        and query) - COMPLETELY UNBIASED
+        """
+        translation_name = translation['name'] if translation else "the Bible"
         
-        # Get current translation name
-        current_trans = self.get_current_translation()
-        translation_name = current_trans['name'] if current_trans else "the Bible"
+        prompt = "".join((
+            RAG_PROMPT_HEAD.format(translation_name=translation_name),
+            CONTEXT_SEPARATOR.join(chunk['content'] for chunk in retrieved_chunks),
+            RAG_PROMPT_TAIL.format(query=query)
+        ))
         
-        prompt = f"""You are a Bible reference assistant. Your role is to provide ONLY what is written in the biblical text, without interpretation, opinion, or theological commentary.
-
-The user is currently reading from: {translation_name}
-
-STRICT INSTRUCTIONS:
-1. ONLY quote or paraphrase what is explicitly written in the provided Bible text below
-2. DO NOT add theological interpretations, doctrinal explanations, or personal opinions
-3. DO NOT explain what verses "mean" - only state what they literally say
-4. If asked for interpretation or meaning, respond: "I provide only what the text says. For interpretation, please consult a pastor, theologian, or Bible study guide."
-5. If comparing translations, ONLY note the different wording used - do not explain which is "better" or "more accurate"
-6. If the text doesn't contain the answer, say: "I don't see that specific information in the {translation_name} passages I have access to."
-7. When citing passages, use natural verse ranges (e.g., "John 3:16-18" instead of "verse 16, verse 17, verse 18")
-8. For consecutive verses, introduce ONCE with the verse range at the beginning (e.g., "John 3 verses 16 to 18 say:") then read the text smoothly without repeating "verse 16", "verse 17" for each one
-9. Read the biblical text naturally and conversationally - avoid robotic verse-by-verse announcements
-10. If asked about context (historical, cultural), only provide it if it's explicitly mentioned in the biblical text itself
-
-BIBLE TEXT FROM {translation_name}:
-{context}
-
-USER'S QUESTION:
-{query}
-
-YOUR RESPONSE (Bible text only, no interpretation, natural verse ranges):"""
+        return RAG_SYSTEM_PROMPT, prompt
+    
+    
+    async def aquery(self, question: str, k: int = None, include_sources: bool = False) -> Dict:
+        """
+        Query the RAG system with a Bible study question
+        Retrieval runs in a worker thread and generation uses the AsyncGroq client,
+        so the event loop stays free while waiting on embeddings and the LLM
+        """
+        try:
+            if not self.current_translation or not self.vectorstore:
+                return self._no_translation_result(question)
+            
+            # Captured before the first await - a concurrent switch_translation()
+            # must not change which translation answers this question
+            translation_id = self.current_translation
+            question_vector = await self.query_batcher.embed_query(question)
+            
+        except Exception as e:
+            return self._query_error_result(question, e)
         
-        return prompt
+        return await self._aanswer(question, question_vector, translation_id, k, include_sources)
     
     
-    def query(self, question: str, k: int = None, include_sources: bool = False) -> Dict:
-        """Query the RAG system with a Bible study question"""
+    async def aquery_batch(self, questions: List[str], k: int = None,
+                           include_sources: bool = False) -> List[Dict]:
+        """
+        Answer several questions at once
+        All questions are embedded in one batch, then retrieval and generation
+        run concurrently for every question. Results keep the order of questions
+        """
         try:
-            # Check if a translation is active
             if not self.current_translation or not self.vectorstore:
-                return {
-                    'success': False,
-                    'question': question,
-                    'answer': "Please select a Bible translation first before asking questions.",
-                    'num_chunks_used': 0,
-                    'sources': []
-                }
+                return [self._no_translation_result(question) for question in questions]
             
-            # Retrieve relevant chunks
-            retrieved_chunks = self._retrieve_relevant_chunks(question, k)
+            translation_id = self.current_translation
+            question_vectors = await asyncio.to_thread(self.embeddings.embed_queries, questions)
+            
+        except Exception as e:
+            return [self._query_error_result(question, e) for question in questions]
+        
+        return list(await asyncio.gather(*(
+            self._aanswer(question, question_vector, translation_id, k, include_sources)
+            for question, question_vector in zip(questions, question_vectors)
+        )))
+    
+    
+    async def _aanswer(self, question: str, question_vector: List[float], translation_id: str,
+                       k: Optional[int], include_sources: bool) -> Dict:
+        """Answer an embedded question: answer cache first, then retrieval and generation"""
+        try:
+            reference = self._question_reference(question)
+            cached = self.answer_cache.get(question, question_vector, translation_id, k, reference)
+            if cached:
+                return self._answer_for(question, cached, include_sources)
+            
+            retrieved_chunks = await asyncio.to_thread(
+                self._retrieve_relevant_chunks, question, translation_id, k, question_vector
+            )
+            translation = self._translation_info(translation_id)
             
             if not retrieved_chunks:
-                current_trans = self.get_current_translation()
-                translation_name = current_trans['name'] if current_trans else "this translation"
-                
-                return {
-                    'success': False,
-                    'question': question,
-                    'answer': f"I couldn't find any relevant information in {translation_name} to answer your question. Could you rephrase or ask about a different passage?",
-                    'num_chunks_used': 0,
-                    'sources': []
-                }
-                        
-            # Build prompt with context
-            prompt = self._build_rag_prompt(question, retrieved_chunks)
-            
-            # Generate answer using Groq directly
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                return self._no_chunks_result(question, translation)
+            
+            system_prompt, prompt = self._build_rag_prompts(question, retrieved_chunks, translation)
+            answer = await self._acomplete(prompt, system_prompt)
+            
+            result = self._build_query_result(question, answer, retrieved_chunks, translation)
+            self.answer_cache.put(question, question_vector, translation_id, k, result, reference)
+            
+            return self._answer_for(question, result, include_sources)
+            
+        except Exception as e:
+            return self._query_error_result(question, e)
+    
+    
+    async def astream_answer(self, question: str, k: int = None) -> AsyncIterator[str]:
+        """
+        Stream the answer to a question as text deltas from Groq
+        Cached answers and the "nothing found" messages are yielded in one piece
+        """
+        if not self.current_translation or not self.vectorstore:
+            yield self._no_translation_result(question)['answer']
+            return
+        
+        try:
+            translation_id = self.current_translation
+            question_vector = await self.query_batcher.embed_query(question)
+            reference = self._question_reference(question)
+            cached = self.answer_cache.get(question, question_vector, translation_id, k, reference)
+            if cached:
+                yield cached['answer']
+                return
+            
+            retrieved_chunks = await asyncio.to_thread(
+                self._retrieve_relevant_chunks, question, translation_id, k, question_vector
+            )
+            translation = self._translation_info(translation_id)
+            
+            if not retrieved_chunks:
+                yield self._no_chunks_result(question, translation)['answer']
+                return
+            
+            system_prompt, prompt = self._build_rag_prompts(question, retrieved_chunks, translation)
+            stream = await self.async_groq_client.chat.completions.create(
+                messages=self._chat_messages(prompt, system_prompt),
                 model=settings.CHAT_MODEL,
                 temperature=settings.TEMPERATURE,
+                stream=True,
             )
             
-            answer = chat_completion.choices[0].message.content
+            answer_parts = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    answer_parts.append(delta)
+                    yield delta
             
-            result = {
-                'success': True,
-                'question': question,
-                'answer': answer,
-                'num_chunks_used': len(retrieved_chunks),
-                'translation': self.get_current_translation(),
-                'sources': retrieved_chunks if include_sources else []
-            }
-
-            return result
+            result = self._build_query_result(question, "".join(answer_parts), retrieved_chunks, translation)
+            self.answer_cache.put(question, question_vector, translation_id, k, result, reference)
             
         except Exception as e:
-            print(f"RAG Error: {str(e)}")
-            print(f"Traceback:\n{traceback.format_exc()}")
-            return {
-                'success': False,
-                'question': question,
-                'answer': f"An error occurred while processing your question. Please try again.",
-                'num_chunks_used': 0,
-                'error': str(e),
-                'sources': []
-            }
+            # Headers are already sent, so the failure is reported in the stream itself
+            yield self._query_error_result(question, e)['answer']
+    
+    
+    @staticmethod
+    def _chat_messages(prompt: str, system_prompt: Optional[str] = None) -> List[Dict]:
+        """Chat messages for a user prompt, preceded by the system prompt if given"""
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        return messages
+    
+    
+    async def _acomplete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Run a single-prompt chat completion on Groq without blocking the event loop"""
+        chat_completion = await self.async_groq_client.chat.completions.create(
+            messages=self._chat_messages(prompt, system_prompt),
+            model=settings.CHAT_MODEL,
+            temperature=settings.TEMPERATURE,
+        )
+        return chat_completion.choices[0].message.content
     
     
-    def compare_translations(self, question: str, translation_ids: List[str], k: int = None) -> Dict:
+    def _no_translation_result(self, question: str) -> Dict:
+        """Response returned when no translation has been selected yet"""
+        return {
+            'success': False,
+            'question': question,
+            'answer': "Please select a Bible translation first before asking questions.",
+            'num_chunks_used': 0,
+            'sources': []
+        }
+    
+    
+    def _no_chunks_result(self, question: str, translation: Optional[Dict]) -> Dict:
+        """Response returned when retrieval found nothing for the question"""
+        translation_name = translation['name'] if translation else "this translation"
+        
+        return {
+            'success': False,
+            'question': question,
+            'answer': f"I couldn't find any relevant information in {translation_name} to answer your question. Could you rephrase or ask about a different passage?",
+            'num_chunks_used': 0,
+            'sources': []
+        }
+    
+    
+    def _build_query_result(self, question: str, answer: str, retrieved_chunks: List[Dict],
+                            translation: Optional[Dict]) -> Dict:
+        """Assemble a successful query response (with sources, as stored in the answer cache)"""
+        return {
+            'success': True,
+            'question': question,
+            'answer': answer,
+            'num_chunks_used': len(retrieved_chunks),
+            'translation': translation,
+            'sources': retrieved_chunks
+        }
+    
+    
+    def _answer_for(self, question: str, result: Dict, include_sources: bool) -> Dict:
+        """Copy a (possibly cached) query result for this question, dropping sources if not requested"""
+        answer = dict(result)
+        answer['question'] = question
+        if not include_sources:
+            answer['sources'] = []
+        return answer
+    
+    
+    def _query_error_result(self, question: str, error: Exception) -> Dict:
+        """Log a query failure and build the error response"""
+        logger.exception("RAG Error: %s", error)
+        return {
+            'success': False,
+            'question': question,
+            'answer': "An error occurred while processing your question. Please try again.",
+            'num_chunks_used': 0,
+            'error': str(error),
+            'sources': []
+        }
+    
+    
+    async def acompare_translations(self, question: str, translation_ids: List[str], k: int = None) -> Dict:
         """
         Compare the same passage across multiple Bible translations
-        NOW HANDLES BOTH: Specific verse requests AND topical searches
+        Handles both specific verse requests and topical searches
+        Per-translation lookups are dispatched together with asyncio.gather, so
+        N translations cost roughly one retrieval instead of N in a row
         """
         try:
-            if not translation_ids or len(translation_ids) < 2:
-                return {
-                    'success': False,
-                    'question': question,
-                    'error': 'Please select at least 2 translations to compare',
-                    'comparisons': []
-                }
-            
-            # Check all translations exist
-            metadata = self._load_translations_metadata()
-            for trans_id in translation_ids:
-                if trans_id not in metadata:
-                    return {
-                        'success': False,
-                        'question': question,
-                        'error': f'Translation "{trans_id}" not found',
-                        'comparisons': []
-                    }
+            error, metadata = self._check_comparison_request(question, translation_ids)
+            if error:
+                return error
             
             if k is None:
                 k = settings.RETRIEVAL_K
             
-            # Check if this is a specific verse request or topical search
             verse_ref = self._extract_verse_reference(question)
+            reference = verse_ref['reference'] if verse_ref else None
+            
+            question_vector = await self.query_batcher.embed_query(question)
+            translations_key = ",".join(translation_ids)
+            cached = self.comparison_cache.get(question, question_vector, translations_key, k, reference)
+            if cached is not None:
+                return {**cached, 'question': question}
             
             if verse_ref:
-                # SPECIFIC VERSE: Fetch the SAME verse from all translations
-                print(f"📖 Specific verse comparison: {verse_ref['reference']}")
-                return self._compare_specific_verses(question, translation_ids, verse_ref, k, metadata)
+                logger.debug("📖 Specific verse comparison: %s", verse_ref['reference'])
+                result = await self._acompare_specific_verses(question, translation_ids, verse_ref, k, metadata)
             else:
-                # TOPICAL SEARCH: Find verses in ONE translation, then fetch same verses from others
-                print(f"🔍 Topical comparison for: {question}")
-                return self._compare_topical_search(question, translation_ids, k, metadata)
+                logger.debug("🔍 Topical comparison for: %s", question)
+                result = await self._acompare_topical_search(question, translation_ids, k, metadata)
+            
+            if result.get('success'):
+                self.comparison_cache.put(question, question_vector, translations_key, k, result, reference)
+            return result
                 
         except Exception as e:
-            print(f"Comparison Error: {str(e)}")
-            print(f"Traceback:\n{traceback.format_exc()}")
+            return self._comparison_error_result(question, e)
+    
+    
+    def _check_comparison_request(self, question: str, translation_ids: List[str]) -> tuple:
+        """
+        Validate the translations requested for a comparison
+        Returns (error_response, metadata) - error_response is None when valid
+        """
+        if not translation_ids or len(translation_ids) < 2:
             return {
                 'success': False,
                 'question': question,
-                'error': str(e),
+                'error': 'Please select at least 2 translations to compare',
                 'comparisons': []
-            }
-    
-    
-    def _compare_specific_verses(self, question: str, translation_ids: List[str], 
-                                 verse_ref: Dict, k: int, metadata: Dict) -> Dict:
-        """Compare a specific verse/passage across translations"""
-        comparisons = []
+            }, None
         
+        # Check all translations exist
+        metadata = self._load_translations_metadata()
         for trans_id in translation_ids:
-            try:
-                # Load translation's vector store
-                translation_path = self.chroma_base_path / trans_id
-                vectorstore = Chroma(
-                    persist_directory=str(translation_path),
-                    embedding_function=self.embeddings
-                )
-                
-                # Search for the SPECIFIC verse using metadata filter
-                book_variations = [
-                    verse_ref['book'],
-                    f"Gospel of {verse_ref['book']}",
-                    f"{verse_ref['book']}'s Gospel",
-                ]
-                
-                retrieved_chunks = []
-                for book_name in book_variations:
-                    try:
-                        results = vectorstore.similarity_search(
-                            verse_ref['reference'],
-                            k=k * 3,
-                            filter={
-                                "$and": [
-                                    {"book": {"$eq": book_name}},
-                                    {"chapter": {"$eq": verse_ref['chapter']}}
-                                ]
-                            }
-                        )
-                        
-                        # Filter to exact verse range
-                        for doc in results:
-                            doc_v_start = doc.metadata.get('verse_start', 0)
-                            doc_v_end = doc.metadata.get('verse_end', doc_v_start)
-                            
-                            if (doc_v_start >= verse_ref['verse_start'] and 
-                                doc_v_start <= verse_ref['verse_end']):
-                                retrieved_chunks.append({
-                                    'content': doc.page_content,
-                                    'score': 1.0,
-                                    'metadata': doc.metadata
-                                })
-                        
-                        if retrieved_chunks:
-                            break
-                            
-                    except Exception as e:
-                        continue
-                
-                trans_info = metadata[trans_id]
-                comparisons.append({
-                    'translation_id': trans_id,
-                    'translation_name': trans_info.get('name', trans_id),
-                    'chunks': retrieved_chunks,
-                    'num_chunks': len(retrieved_chunks),
-                    'has_results': len(retrieved_chunks) > 0
-                })
-                
-                print(f"✓ {trans_info.get('name', trans_id)}: Found {len(retrieved_chunks)} chunks")
-                
-            except Exception as e:
-                print(f"❌ Error retrieving {trans_id}: {e}")
-                comparisons.append({
-                    'translation_id': trans_id,
-                    'translation_name': metadata.get(trans_id, {}).get('name', trans_id),
-                    'chunks': [],
-                    'num_chunks': 0,
-                    'has_results': False,
-                    'error': str(e)
-                })
-        
-        # Generate comparison
-        comparison_prompt = self._build_comparison_prompt(question, comparisons)
-        chat_completion = self.groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": comparison_prompt}],
-            model=settings.CHAT_MODEL,
-            temperature=settings.TEMPERATURE,
-        )
-        
-        full_response = chat_completion.choices[0].message.content
-        
-        # Parse response
-        spoken_text, table_html = self._parse_comparison_response(full_response)
+            if trans_id not in metadata:
+                return {
+                    'success': False,
+                    'question': question,
+                    'error': f'Translation "{trans_id}" not found',
+                    'comparisons': []
+                }, None
         
+        return None, metadata
+    
+    
+    def _comparison_error_result(self, question: str, error: Exception) -> Dict:
+        """Log a comparison failure and build the error response"""
+        logger.exception("Comparison Error: %s", error)
         return {
-            'success': True,
+            'success': False,
             'question': question,
-            'analysis': spoken_text,
-            'table_html': table_html,
-            'comparisons': comparisons,
-            'num_translations': len(comparisons)
+            'error': str(error),
+            'comparisons': []
         }
     
     
-    def _compare_topical_search(self, question: str, translation_ids: List[str], 
-                                k: int, metadata: Dict) -> Dict:
+    async def _acompare_specific_verses(self, question: str, translation_ids: List[str],
+                                        verse_ref: Dict, k: int, metadata: Dict) -> Dict:
+        """Compare a specific verse/passage across translations - one retrieval task per translation"""
+        comparisons = await asyncio.gather(*[
+            asyncio.to_thread(self._retrieve_translation_passage, trans_id, verse_ref, k, metadata)
+            for trans_id in translation_ids
+        ])
+        
+        comparison_prompt = self._build_comparison_prompt(question, comparisons)
+        full_response = await self._acomplete(comparison_prompt)
+        
+        return self._build_comparison_result(question, full_response, comparisons, len(comparisons))
+    
+    
+    def _retrieve_translation_passage(self, trans_id: str, verse_ref: Dict,
+                                      k: int, metadata: Dict) -> Dict:
+        """Fetch a specific verse/passage from one translation as a comparison entry"""
+        try:
+            # Load translation's vector store
+            vectorstore = get_vectorstore(trans_id)
+            
+            # Search for the SPECIFIC verse using metadata filter
+            book_variations = [
+                verse_ref['book'],
+                f"Gospel of {verse_ref['book']}",
+                f"{verse_ref['book']}'s Gospel",
+            ]
+            
+            try:
+                results = self._fetch_verse_range(vectorstore, verse_ref, book_variations, k * 3)
+            except Exception:
+                results = []
+            
+            # Filter to exact verse range
+            retrieved_chunks = []
+            for doc in results:
+                doc_v_start = doc.metadata.get('verse_start', 0)
+                
+                if verse_ref['verse_start'] <= doc_v_start <= verse_ref['verse_end']:
+                    retrieved_chunks.append({
+                        'content': doc.page_content,
+                        'score': 1.0,
+                        'metadata': doc.metadata
+                    })
+            
+            trans_info = metadata[trans_id]
+            logger.debug("✓ %s: Found %d chunks", trans_info.get('name', trans_id), len(retrieved_chunks))
+            
+            return {
+                'translation_id': trans_id,
+                'translation_name': trans_info.get('name', trans_id),
+                'chunks': retrieved_chunks,
+                'num_chunks': len(retrieved_chunks),
+                'has_results': len(retrieved_chunks) > 0
+            }
+            
+        except Exception as e:
+            logger.error("❌ Error retrieving %s: %s", trans_id, e)
+            return {
+                'translation_id': trans_id,
+                'translation_name': metadata.get(trans_id, {}).get('name', trans_id),
+                'chunks': [],
+                'num_chunks': 0,
+                'has_results': False,
+                'error': str(e)
+            }
+    
+    
+    async def _acompare_topical_search(self, question: str, translation_ids: List[str],
+                                       k: int, metadata: Dict) -> Dict:
         """
         Compare topical search across translations
         Strategy: Search in first translation, extract verse refs, fetch from all
+        The per-translation lookups run concurrently
         """
+        verse_references = await asyncio.to_thread(
+            self._find_topical_references, question, translation_ids[0], k
+        )
         
-        # Step 1: Do semantic search in FIRST translation to find relevant verses
-        first_trans_id = translation_ids[0]
-        translation_path = self.chroma_base_path / first_trans_id
-        vectorstore = Chroma(
-            persist_directory=str(translation_path),
-            embedding_function=self.embeddings
+        if verse_references is None:
+            return self._no_topical_passages_result(question)
+        
+        texts_by_translation = await asyncio.gather(*[
+            asyncio.to_thread(self._fetch_verse_texts, trans_id, verse_references)
+            for trans_id in translation_ids
+        ])
+        
+        # Nothing to compare - skip the LLM call
+        if not any(text for texts in texts_by_translation for text in texts):
+            return self._no_topical_passages_result(question)
+        
+        all_comparisons = self._assemble_topical_comparisons(
+            verse_references, translation_ids, metadata, texts_by_translation
         )
         
+        comparison_prompt = self._build_topical_comparison_prompt(question, all_comparisons, translation_ids, metadata)
+        full_response = await self._acomplete(comparison_prompt)
+        
+        return self._build_comparison_result(question, full_response, all_comparisons, len(translation_ids))
+    
+    
+    def _find_topical_references(self, question: str, trans_id: str, k: int) -> Optional[List[Dict]]:
+        """
+        Semantic search in one translation and turn the hits into verse references
+        Returns None when the search found nothing at all
+        """
         # Get relevant verses from first translation
-        results = vectorstore.similarity_search_with_score(question, k=min(k, 3))
+        results = semantic_search(trans_id, self.embeddings.embed_query(question), min(k, 3))
         
         if not results:
-            return {
-                'success': False,
-                'question': question,
-                'error': 'Could not find relevant passages for comparison',
-                'comparisons': []
-            }
+            return None
         
-        # Step 2: Extract verse references from results
+        # Extract verse references from results
         verse_references = []
         for doc, score in results:
             meta = doc.metadata
@@ -700,73 +1072,122 @@ YOUR RESPONSE (Bible text only, no interpretation, natural verse ranges):"""
                     verse_ref['reference'] += f"-{verse_ref['verse_end']}"
                 verse_references.append(verse_ref)
         
-        print(f"📚 Found {len(verse_references)} relevant passages to compare")
+        logger.debug("📚 Found %d relevant passages to compare", len(verse_references))
         
-        # Step 3: Fetch these SAME verses from ALL translations
+        return verse_references
+    
+    
+    def _fetch_verse_texts(self, trans_id: str, verse_references: List[Dict]) -> List[Optional[str]]:
+        """
+        Look up the text of several verse references in one translation
+        All references go into a single metadata query; None where a verse wasn't found
+        """
+        if not verse_references:
+            return []
+        
+        book_names = [
+            [verse_ref['book'], f"Gospel of {verse_ref['book']}", f"{verse_ref['book']}'s Gospel"]
+            for verse_ref in verse_references
+        ]
+        filters = [
+            self._verse_range_filter(verse_ref, names)
+            for verse_ref, names in zip(verse_references, book_names)
+        ]
+        
+        try:
+            data = get_vectorstore(trans_id)._collection.get(
+                where=filters[0] if len(filters) == 1 else {"$or": filters},
+                include=['documents', 'metadatas']
+            )
+        except Exception as e:
+            logger.debug("Verse lookup failed in %s: %s", trans_id, e)
+            return [None] * len(verse_references)
+        
+        rows = sorted(
+            ((text, meta or {}) for text, meta in zip(data['documents'], data['metadatas'])),
+            key=lambda row: row[1].get('verse_start', 0)
+        )
+        
+        # First chunk (in verse order) inside each reference's range
+        return [
+            next((
+                text for text, meta in rows
+                if meta.get('book') in names
+                and meta.get('chapter') == verse_ref['chapter']
+                and verse_ref['verse_start'] <= meta.get('verse_start', 0) <= verse_ref['verse_end']
+            ), None)
+            for verse_ref, names in zip(verse_references, book_names)
+        ]
+    
+    
+    @staticmethod
+    def _verse_range_filter(verse_ref: Dict, book_names: List[str]) -> Dict:
+        """Chroma where-clause for chunks starting inside a verse range, under any spelling of the book"""
+        return {
+            "$and": [
+                {"book": {"$in": book_names}},
+                {"chapter": {"$eq": verse_ref['chapter']}},
+                {"verse_start": {"$gte": verse_ref['verse_start']}},
+                {"verse_start": {"$lte": verse_ref['verse_end']}}
+            ]
+        }
+    
+    
+    @classmethod
+    def _fetch_verse_range(cls, vectorstore, verse_ref: Dict, book_names: List[str], limit: int) -> List[Document]:
+        """
+        Chunks starting inside the referenced verse range, in verse order
+        A plain metadata lookup - the reference is exact, so there is nothing to rank
+        """
+        data = vectorstore._collection.get(
+            where=cls._verse_range_filter(verse_ref, book_names),
+            limit=limit,
+            include=['documents', 'metadatas']
+        )
+        
+        documents = [
+            Document(page_content=text, metadata=meta or {})
+            for text, meta in zip(data['documents'], data['metadatas'])
+        ]
+        documents.sort(key=lambda doc: doc.metadata.get('verse_start', 0))
+        return documents
+    
+    
+    def _assemble_topical_comparisons(self, verse_references: List[Dict], translation_ids: List[str],
+                                      metadata: Dict, texts_by_translation: List[List[Optional[str]]]) -> List[Dict]:
+        """Group verse texts (one list per translation) into one comparison row per reference"""
         all_comparisons = []
         
-        for verse_ref in verse_references:
+        for position, verse_ref in enumerate(verse_references):
             verse_comparison = {
                 'reference': verse_ref['reference'],
                 'translations': {}
             }
             
-            for trans_id in translation_ids:
-                trans_path = self.chroma_base_path / trans_id
-                vectorstore = Chroma(
-                    persist_directory=str(trans_path),
-                    embedding_function=self.embeddings
-                )
-                
-                # Search for this specific verse
-                book_variations = [
-                    verse_ref['book'],
-                    f"Gospel of {verse_ref['book']}",
-                    f"{verse_ref['book']}'s Gospel",
-                ]
-                
-                found_content = None
-                for book_name in book_variations:
-                    try:
-                        results = vectorstore.similarity_search(
-                            verse_ref['reference'],
-                            k=5,
-                            filter={
-                                "$and": [
-                                    {"book": {"$eq": book_name}},
-                                    {"chapter": {"$eq": verse_ref['chapter']}}
-                                ]
-                            }
-                        )
-                        
-                        for doc in results:
-                            doc_v_start = doc.metadata.get('verse_start', 0)
-                            if verse_ref['verse_start'] <= doc_v_start <= verse_ref['verse_end']:
-                                found_content = doc.page_content
-                                break
-                        
-                        if found_content:
-                            break
-                    except:
-                        continue
-                
+            for trans_id, texts in zip(translation_ids, texts_by_translation):
                 verse_comparison['translations'][trans_id] = {
                     'name': metadata[trans_id].get('name', trans_id),
-                    'content': found_content or "Not found"
+                    'content': texts[position] or "Not found"
                 }
             
             all_comparisons.append(verse_comparison)
         
-        # Step 4: Build special prompt for multiple verse comparison
-        comparison_prompt = self._build_topical_comparison_prompt(question, all_comparisons, translation_ids, metadata)
-        
-        chat_completion = self.groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": comparison_prompt}],
-            model=settings.CHAT_MODEL,
-            temperature=settings.TEMPERATURE,
-        )
-        
-        full_response = chat_completion.choices[0].message.content
+        return all_comparisons
+    
+    
+    def _no_topical_passages_result(self, question: str) -> Dict:
+        """Response returned when a topical comparison finds no passages"""
+        return {
+            'success': False,
+            'question': question,
+            'error': 'Could not find relevant passages for comparison',
+            'comparisons': []
+        }
+    
+    
+    def _build_comparison_result(self, question: str, full_response: str,
+                                 comparisons: List[Dict], num_translations: int) -> Dict:
+        """Parse the LLM comparison output and assemble the response"""
         spoken_text, table_html = self._parse_comparison_response(full_response)
         
         return {
@@ -774,8 +1195,8 @@ YOUR RESPONSE (Bible text only, no interpretation, natural verse ranges):"""
             'question': question,
             'analysis': spoken_text,
             'table_html': table_html,
-            'comparisons': all_comparisons,
-            'num_translations': len(translation_ids)
+            'comparisons': comparisons,
+            'num_translations': num_translations
         }
     
     
@@ -799,35 +1220,12 @@ YOUR RESPONSE (Bible text only, no interpretation, natural verse ranges):"""
         # Get translation names for the table - INCLUDE ALL
         trans_names = [comp['translation_name'] for comp in comparisons]
         
-        prompt = f"""You are comparing Bible translations. You MUST provide your response in this EXACT format:
-
-[SPOKEN]: Brief summary here
-
-[TABLE]: HTML table here
-
-USER'S QUESTION:
-{question}
-
-BIBLE TEXT FROM EACH TRANSLATION:
-{combined_context}
-
-PART 1 - SPOKEN SUMMARY:
-Start with "[SPOKEN]:" then write a brief 2-3 sentence summary.
-If some translations don't have the passage, mention this in your summary.
-
-PART 2 - HTML TABLE:
-Start with "[TABLE]:" then create an HTML table showing ALL {len(trans_names)} translations side-by-side.
-
-Requirements:
-- Use <table class="comparison-table">
-- First column header: "Passage"
-- Column headers for ALL translations: {', '.join(trans_names)}
-- If a translation doesn't have the passage, put "Not found" in that cell
-- Each row shows: verse reference | text from each translation
-
-CRITICAL: You MUST include columns for ALL {len(trans_names)} translations: {', '.join(trans_names)}
-
-YOUR RESPONSE (must have both parts and all {len(trans_names)} translation columns):"""
+        prompt = COMPARISON_PROMPT.format(
+            question=question,
+            context=combined_context,
+            num_translations=len(trans_names),
+            translation_names=", ".join(trans_names)
+        )
         
         return prompt
     
@@ -850,75 +1248,30 @@ YOUR RESPONSE (must have both parts and all {len(trans_names)} translation colum
         
         combined_context = "\n".join(context_parts)
         
-        prompt = f"""You are comparing Bible translations for a topical question. You MUST provide your response in this EXACT format:
-
-[SPOKEN]: Brief summary here
-
-[TABLE]: HTML table here
-
-USER'S QUESTION:
-{question}
-
-RELEVANT PASSAGES FROM EACH TRANSLATION:
-{combined_context}
-
-PART 1 - SPOKEN SUMMARY:
-Start with "[SPOKEN]:" then write a 2-3 sentence summary explaining how the translations address this topic.
-
-PART 2 - HTML TABLE:
-Start with "[TABLE]:" then create an HTML table with these specifications:
-- Use <table class="comparison-table">
-- First column header: "Passage"
-- Other column headers: {', '.join(trans_names)}
-- One row per verse reference
-- Show text from each translation (or "Not found")
-
-Example structure:
-[TABLE]:
-<table class="comparison-table">
-<tr>
-<th>Passage</th>
-<th>{trans_names[0]}</th>
-<th>{trans_names[1]}</th>
-{f'<th>{trans_names[2]}</th>' if len(trans_names) > 2 else ''}
-</tr>
-<tr>
-<td>John 3:16</td>
-<td>For God so loved...</td>
-<td>For God so loved...</td>
-{f'<td>For God so loved...</td>' if len(trans_names) > 2 else ''}
-</tr>
-</table>
-
-YOUR RESPONSE (must have both [SPOKEN]: and [TABLE]:):"""
+        prompt = TOPICAL_COMPARISON_PROMPT.format(
+            question=question,
+            context=combined_context,
+            translation_names=", ".join(trans_names),
+            first_name=trans_names[0],
+            second_name=trans_names[1],
+            third_header=f"<th>{trans_names[2]}</th>" if len(trans_names) > 2 else "",
+            third_cell="<td>For God so loved...</td>" if len(trans_names) > 2 else ""
+        )
         
         return prompt
     
     
     def _parse_comparison_response(self, full_response: str) -> tuple:
         """Parse AI response into spoken and table parts"""
-        spoken_text = ""
-        table_html = ""
-        
-        if "[SPOKEN]:" in full_response and "[TABLE]:" in full_response:
-            parts = full_response.split("[TABLE]:")
-            spoken_text = parts[0].replace("[SPOKEN]:", "").strip()
-            table_html = parts[1].strip()
-        else:
-            spoken_text = full_response
-            table_html = ""
+        match = COMPARISON_RESPONSE_PATTERN.search(full_response)
+        if match is None:
+            return full_response, ""
         
-        return spoken_text, table_html
+        return match['spoken'], match['table']
 
 
 # Singleton instance
-_rag_service = None
-
+@lru_cache()
 def get_rag_service() -> RAGService:
     """Get or create RAG service instance"""
-    global _rag_service
-    
-    if _rag_service is None:
-        _rag_service = RAGService()
-    
-    return _rag_service
\ No newline at end of file
+    return RAGService()
@@ -3,8 +3,23 @@ Speech Service
 Text-to-speech using Edge TTS (Microsoft Edge's TTS - Free!)
 """
 
+import asyncio
+import logging
+import re
+from functools import lru_cache
+from typing import AsyncIterator
+
 import edge_tts
 
+logger = logging.getLogger(__name__)
+
+# A sentence is ready to speak once it ends in terminal punctuation
+SENTENCE_END = re.compile(r'[.?!]["\')\]]?\s*$')
+MAX_BUFFERED_WORDS = 80
+# Sentences synthesized ahead of the one being sent - bounds concurrent
+# Edge TTS connections and the audio held in memory
+SPEECH_LOOKAHEAD = 3
+
 
 class SpeechService:
     """Service for text-to-speech conversion using Edge TTS"""
@@ -32,6 +47,28 @@ class SpeechService:
         Returns:
             Audio bytes (MP3 format)
         """
+        audio = bytearray()
+        async for chunk in self.stream_tts(text, voice, rate, pitch):
+            audio += chunk
+        
+        return bytes(audio)
+    
+    async def stream_tts(
+        self,
+        text: str,
+        voice: str = "en-US-JennyNeural",
+        rate: str = "+0%",
+        pitch: str = "+0Hz"
+    ) -> AsyncIterator[bytes]:
+        """
+        Convert text to speech, yielding audio as Edge TTS produces it
+        
+        Args:
+            text, voice, rate, pitch: As for text_to_speech()
+            
+        Yields:
+            Audio bytes (MP3 format), in the order received
+        """
         communicate = edge_tts.Communicate(
             text=text,
             voice=voice,
@@ -39,21 +76,85 @@ class SpeechService:
             pitch=pitch
         )
         
-        # Collect audio chunks
-        audio_chunks = []
         async for chunk in communicate.stream():
             if chunk["type"] == "audio":
-                audio_chunks.append(chunk["data"])
+                yield chunk["data"]
+    
+    async def stream_speech(
+        self,
+        text_stream: AsyncIterator[str],
+        voice: str = "en-US-JennyNeural",
+        rate: str = "+0%",
+        pitch: str = "+0Hz"
+    ) -> AsyncIterator[bytes]:
+        """
+        Pipeline streamed text into TTS one sentence at a time
+        
+        Text is buffered until a sentence ends (or MAX_BUFFERED_WORDS is reached),
+        then synthesized in the background while more text arrives - at most
+        SPEECH_LOOKAHEAD sentences at a time. Audio is yielded in sentence order;
+        a sentence whose synthesis fails is logged and skipped.
+        
+        Args:
+            text_stream: Async iterator of text deltas (e.g. streamed LLM output)
+            voice, rate, pitch: Passed through to text_to_speech()
+            
+        Yields:
+            Audio bytes (MP3 format), one sentence at a time
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        # Released once a sentence's audio has been sent
+        slots = asyncio.Semaphore(SPEECH_LOOKAHEAD)
+        
+        async def synthesize(sentence: str):
+            await slots.acquire()
+            await pending.put(asyncio.create_task(self.text_to_speech(sentence, voice, rate, pitch)))
+        
+        async def produce():
+            buffer = ""
+            try:
+                async for delta in text_stream:
+                    buffer += delta
+                    if SENTENCE_END.search(buffer) or len(buffer.split()) >= MAX_BUFFERED_WORDS:
+                        await synthesize(buffer.strip())
+                        buffer = ""
+                
+                if buffer.strip():
+                    await synthesize(buffer.strip())
+            finally:
+                await pending.put(None)
         
-        return b"".join(audio_chunks)
+        producer = asyncio.create_task(produce())
+        
+        try:
+            while True:
+                task = await pending.get()
+                if task is None:
+                    break
+                
+                try:
+                    audio = await task
+                except Exception:
+                    logger.exception("TTS failed for a streamed sentence, skipping it")
+                    audio = b""
+                finally:
+                    slots.release()
+                
+                if audio:
+                    yield audio
+            
+            # Surface errors from the text stream
+            await producer
+        finally:
+            producer.cancel()
+            while not pending.empty():
+                task = pending.get_nowait()
+                if task is not None:
+                    task.cancel()
 
 
 # Singleton
-_speech_service = None
-
+@lru_cache()
 def get_speech_service() -> SpeechService:
     """Get or create speech service instance"""
-    global _speech_service
-    if _speech_service is None:
-        _speech_service = SpeechService()
-    return _speech_service
\ No newline at end of file
+    return SpeechService()
\ No newline at end of file
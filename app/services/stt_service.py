@@ -2,21 +2,52 @@
 Speech-to-Text Service using Groq Whisper API
 """
 
-from groq import Groq
 from app.core.config import get_settings
-from typing import Optional
+from app.core.clients import get_groq_client
+from functools import lru_cache
+import logging
 import os
+import re
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Commonly misheard domain-specific terms (lowercase) and their fixes
+CORRECTIONS = {
+    # GainSkills variations
+    "gang skills": "GainSkills",
+    "gain skills": "GainSkills",
+    "games skills": "GainSkills",
+    "gaines skills": "GainSkills",
+    "game skills": "GainSkills",
+    
+    # CodeQuest variations
+    "code quest": "CodeQuest",
+    "coat quest": "CodeQuest",
+    "cold quest": "CodeQuest",
+    "code price": "CodeQuest",
+    
+    # AI Interview Coach
+    "ai interview coach": "AI Interview Coach",
+    "interview coach": "AI Interview Coach",
+}
+
+# One pass over the text for all corrections - longest phrases first, so
+# "ai interview coach" wins over "interview coach"; whole words only, so
+# "decode quest" is left alone
+CORRECTIONS_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(wrong) for wrong in sorted(CORRECTIONS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
 
 class STTService:
     """Service for speech-to-text conversion using Groq Whisper API"""
     
     def __init__(self):
         """Initialize Groq Whisper client"""
-        print("Initializing Groq Whisper API...")
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
-        print("✓ Groq Whisper ready!")
+        logger.info("Initializing Groq Whisper API...")
+        self.client = get_groq_client()
+        logger.info("✓ Groq Whisper ready!")
         
         # Context prompt helps with domain-specific vocabulary
         self.context_prompt = """
@@ -37,16 +68,16 @@ class STTService:
             Dictionary with transcription result
         """
         try:
-            # Read audio file
+            # Pass the open file so the upload is streamed from disk, not read into memory
             with open(audio_file_path, "rb") as audio_file:
                 # Transcribe with Groq Whisper
                 transcription = self.client.audio.transcriptions.create(
-                    file=(os.path.basename(audio_file_path), audio_file.read()),
+                    file=(os.path.basename(audio_file_path), audio_file),
                     model="whisper-large-v3-turbo",  # Best model, still FREE
                     language=language,
                     prompt=self.context_prompt,  # Helps with domain vocabulary
                     temperature=0.0,  # Most consistent results
-                    response_format="verbose_json"  # Get detailed info
+                    response_format="json"  # Only the text is used - skip per-segment detail
                 )
             
             # Extract text
@@ -62,9 +93,7 @@ class STTService:
             }
             
         except Exception as e:
-            print(f"STT Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("STT Error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -73,40 +102,11 @@ class STTService:
     
     def fix_common_mistakes(self, text: str) -> str:
         """Fix commonly misheard domain-specific terms"""
-        import re
-        
-        corrections = {
-            # GainSkills variations
-            "gang skills": "GainSkills",
-            "gain skills": "GainSkills",
-            "games skills": "GainSkills",
-            "gaines skills": "GainSkills",
-            "game skills": "GainSkills",
-            
-            # CodeQuest variations
-            "code quest": "CodeQuest",
-            "coat quest": "CodeQuest",
-            "cold quest": "CodeQuest",
-            "code price": "CodeQuest",
-            
-            # AI Interview Coach
-            "ai interview coach": "AI Interview Coach",
-            "interview coach": "AI Interview Coach",
-        }
-        
-        result = text
-        for wrong, correct in corrections.items():
-            result = re.sub(re.escape(wrong), correct, result, flags=re.IGNORECASE)
-        
-        return result
+        return CORRECTIONS_PATTERN.sub(lambda match: CORRECTIONS[match.group(0).lower()], text)
 
 
 # Singleton
-_stt_service: Optional[STTService] = None
-
+@lru_cache()
 def get_stt_service() -> STTService:
     """Get or create STT service instance"""
-    global _stt_service
-    if _stt_service is None:
-        _stt_service = STTService()
-    return _stt_service
\ No newline at end of file
+    return STTService()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Vector Store Helpers
+Single place where translation collections are opened, so every collection
+is created with the same HNSW index settings and each is opened only once
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import get_settings
+from app.services.embeddings import get_embeddings
+
+settings = get_settings()
+
+# Applied when a collection is first created (Chroma ignores it for existing ones)
+HNSW_COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": settings.HNSW_M,
+    "hnsw:construction_ef": settings.HNSW_CONSTRUCTION_EF,
+    "hnsw:search_ef": settings.HNSW_SEARCH_EF,
+}
+
+
+def open_vectorstore(persist_directory: str, embeddings: Embeddings) -> Chroma:
+    """Open (or create) the Chroma collection stored in a translation directory"""
+    return Chroma(
+        persist_directory=persist_directory,
+        embedding_function=embeddings,
+        collection_metadata=HNSW_COLLECTION_METADATA,
+        # No telemetry calls when a client is opened
+        client_settings=ChromaSettings(
+            is_persistent=True,
+            persist_directory=persist_directory,
+            anonymized_telemetry=False
+        )
+    )
+
+
+# Open collections, one per translation, shared by every service
+_vectorstores: Dict[str, Chroma] = {}
+_vectorstores_lock = threading.Lock()
+
+
+def get_vectorstore(translation_id: str) -> Chroma:
+    """Get the (cached) vector store for a translation"""
+    with _vectorstores_lock:
+        vectorstore = _vectorstores.get(translation_id)
+        if vectorstore is None:
+            translation_path = Path(settings.CHROMA_DB_PATH) / translation_id
+            vectorstore = open_vectorstore(str(translation_path), get_embeddings())
+            _vectorstores[translation_id] = vectorstore
+    return vectorstore
+
+
+def forget_vectorstore(translation_id: str):
+    """Drop a cached vector store (e.g. when its translation is deleted)"""
+    with _vectorstores_lock:
+        _vectorstores.pop(translation_id, None)
+    forget_dense_index(translation_id)
+
+
+class DenseIndex:
+    """
+    In-memory copy of a translation's chunk vectors for exact search
+    A Bible translation is a few thousand chunks, so one matrix-vector product
+    is cheaper than a round trip through Chroma's query path
+    """
+    
+    def __init__(self, embeddings: np.ndarray, documents: List[str], metadatas: List[Dict]):
+        self.embeddings = embeddings
+        self.documents = documents
+        self.metadatas = metadatas
+    
+    @classmethod
+    def from_vectorstore(cls, vectorstore: Chroma) -> "DenseIndex":
+        """Load every vector, text and metadata dict from a collection"""
+        data = vectorstore._collection.get(include=['embeddings', 'documents', 'metadatas'])
+        embeddings = np.asarray(data['embeddings'], dtype=np.float32)
+        if len(embeddings):
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return cls(embeddings, data['documents'], data['metadatas'])
+    
+    def search(self, query_vector: List[float], k: int) -> List[Tuple[Document, float]]:
+        """Top-k chunks with cosine distances, like Chroma's similarity_search_with_score()"""
+        if not len(self.embeddings):
+            return []
+        
+        scores = self.embeddings @ np.asarray(query_vector, dtype=np.float32)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return [
+            (Document(page_content=self.documents[i], metadata=self.metadatas[i] or {}), float(1.0 - scores[i]))
+            for i in top
+        ]
+
+
+# Dense indexes, one per translation, built on first search. A translation
+# too large to hold in memory is stored as None (searched through Chroma)
+_dense_indexes: Dict[str, Optional[DenseIndex]] = {}
+# When each translation's index was last checked against its collection's size
+_dense_index_checked: Dict[str, float] = {}
+# Bumped by forget_dense_index(), so a build that raced with it is discarded
+_dense_index_generations: Dict[str, int] = {}
+# One lock per translation - building one index never blocks searches of another
+_dense_index_locks: Dict[str, threading.Lock] = {}
+_dense_indexes_lock = threading.Lock()
+
+
+def _dense_index_lock(translation_id: str) -> threading.Lock:
+    """Get the lock that serializes checks and builds of one translation's index"""
+    with _dense_indexes_lock:
+        lock = _dense_index_locks.get(translation_id)
+        if lock is None:
+            lock = _dense_index_locks[translation_id] = threading.Lock()
+    return lock
+
+
+def get_dense_index(translation_id: str) -> Optional[DenseIndex]:
+    """
+    Get the (cached) dense index for a translation
+    Returns None when it is disabled or the translation is too large to hold in memory
+    
+    Another worker process may add chunks at any time, so every
+    DENSE_INDEX_RECHECK_SECONDS the cached index is compared with the
+    collection's size and rebuilt if they differ
+    """
+    checked = _dense_index_checked.get(translation_id)
+    if checked is not None and time.monotonic() - checked < settings.DENSE_INDEX_RECHECK_SECONDS:
+        return _dense_indexes.get(translation_id)
+    
+    with _dense_index_lock(translation_id):
+        # Another search may have checked or rebuilt it while we waited
+        checked = _dense_index_checked.get(translation_id)
+        if checked is not None and time.monotonic() - checked < settings.DENSE_INDEX_RECHECK_SECONDS:
+            return _dense_indexes.get(translation_id)
+        
+        generation = _dense_index_generations.get(translation_id, 0)
+        vectorstore = get_vectorstore(translation_id)
+        count = vectorstore._collection.count()
+        index = _dense_indexes.get(translation_id)
+        
+        if count > settings.DENSE_INDEX_MAX_CHUNKS:
+            index = None
+        elif index is None or len(index.documents) != count:
+            index = DenseIndex.from_vectorstore(vectorstore)
+        
+        with _dense_indexes_lock:
+            if _dense_index_generations.get(translation_id, 0) == generation:
+                _dense_indexes[translation_id] = index
+                _dense_index_checked[translation_id] = time.monotonic()
+    
+    return index
+
+
+def forget_dense_index(translation_id: str):
+    """Drop a cached dense index (e.g. after chunks are added to its translation)"""
+    with _dense_indexes_lock:
+        _dense_indexes.pop(translation_id, None)
+        _dense_index_checked.pop(translation_id, None)
+        _dense_index_generations[translation_id] = _dense_index_generations.get(translation_id, 0) + 1
+
+
+def semantic_search(translation_id: str, query_vector: List[float], k: int) -> List[Tuple[Document, float]]:
+    """Similarity search in a translation for an embedded query, from its dense index when available"""
+    index = get_dense_index(translation_id)
+    if index is None:
+        return get_vectorstore(translation_id).similarity_search_by_vector_with_relevance_scores(query_vector, k=k)
+    return index.search(query_vector, k)
@@ -25,10 +25,20 @@ print("="*70)
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="127.0.0.1",
-        port=8009,
-        reload=True,
-        reload_dirs=[project_root]
-    )
\ No newline at end of file
+    if os.getenv("APP_ENV", "dev") == "prod":
+        # Production: no file watcher, no per-request access log
+        uvicorn.run(
+            "app.main:app",
+            host="127.0.0.1",
+            port=8009,
+            workers=int(os.getenv("WEB_CONCURRENCY", 1)),
+            access_log=False
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="127.0.0.1",
+            port=8009,
+            reload=True,
+            reload_dirs=[project_root]
+        )
\ No newline at end of file
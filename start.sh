@@ -41,4 +41,4 @@ echo "✓ Starting on port: $PORT"
 echo "=========================================="
 
 # Start the application with uvicorn
-exec uvicorn app.main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
+exec uvicorn app.main:app --host 0.0.0.0 --port $PORT --no-access-log
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+DocumentService storage tests
+The service is built without __init__, and the collection is an in-memory stand-in
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("langchain_community")
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("API_KEY", "test")
+
+from langchain_core.documents import Document
+
+from app.services import document_service as document_module
+from app.services.document_service import DocumentService, _chunk_id
+
+
+class FakeCollection:
+    """Just the parts of a Chroma collection _store_chunks() uses"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, ids, include):
+        return {'ids': [chunk_id for chunk_id in ids if chunk_id in self.rows]}
+
+    def add(self, ids, embeddings, documents, metadatas):
+        for chunk_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            assert chunk_id not in self.rows, f"duplicate chunk {chunk_id}"
+            self.rows[chunk_id] = (embedding, document, metadata)
+
+    def count(self):
+        return len(self.rows)
+
+
+class FakeVectorstore:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    vectorstore = FakeVectorstore()
+    forgotten = []
+    monkeypatch.setattr(document_module, "get_vectorstore", lambda translation_id: vectorstore)
+    monkeypatch.setattr(document_module, "forget_dense_index", forgotten.append)
+    # Several write batches, so the embed / write pipelining is exercised
+    monkeypatch.setattr(document_module, "WRITE_BATCH_SIZE", 2)
+
+    service = DocumentService.__new__(DocumentService)
+    service.embeddings = CountingEmbeddings()
+    service.chroma_base_path = tmp_path
+    return service, vectorstore._collection, forgotten
+
+
+def _chunks(*texts):
+    return [Document(page_content=text, metadata={'source': "john.txt"}) for text in texts]
+
+
+def test_chunk_ids_are_content_addressed_per_translation():
+    assert _chunk_id("kjv", "In the beginning") == _chunk_id("kjv", "In the beginning")
+    assert _chunk_id("kjv", "In the beginning") != _chunk_id("niv", "In the beginning")
+    assert _chunk_id("kjv", "In the beginning") != _chunk_id("kjv", "In the beginning.")
+    assert _chunk_id("kjv", "In the beginning").startswith("kjv:")
+
+
+def test_store_chunks_adds_every_distinct_chunk(store):
+    service, collection, forgotten = store
+
+    added, total = service._store_chunks(_chunks("a", "b", "c", "a", "d"), "kjv")
+
+    assert (added, total) == (4, 4)
+    assert sorted(document for _, document, _ in collection.rows.values()) == ["a", "b", "c", "d"]
+    assert set(collection.rows) == {_chunk_id("kjv", text) for text in "abcd"}
+    assert forgotten == ["kjv"]
+
+
+def test_reupload_adds_no_duplicates_and_keeps_the_dense_index(store):
+    service, collection, forgotten = store
+    service._store_chunks(_chunks("a", "b", "c"), "kjv")
+    service.embeddings.embedded.clear()
+    forgotten.clear()
+
+    added, total = service._store_chunks(_chunks("a", "b", "c"), "kjv")
+
+    assert (added, total) == (0, 3)
+    assert service.embeddings.embedded == []
+    assert forgotten == []
+
+
+def test_partial_reupload_embeds_only_new_chunks(store):
+    service, collection, forgotten = store
+    service._store_chunks(_chunks("a", "b"), "kjv")
+    service.embeddings.embedded.clear()
+    forgotten.clear()
+
+    added, total = service._store_chunks(_chunks("a", "b", "c", "d", "e"), "kjv")
+
+    assert (added, total) == (3, 5)
+    assert sorted(service.embeddings.embedded) == ["c", "d", "e"]
+    assert forgotten == ["kjv"]
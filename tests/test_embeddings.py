@@ -0,0 +1,76 @@
+"""
+Embedding helper tests
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("langchain_huggingface")
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("API_KEY", "test")
+
+from app.services.embeddings import EmbeddingBatcher
+
+
+class RecordingEmbeddings:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def embed_queries(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_questions_are_embedded_in_one_call():
+    embeddings = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(embeddings)
+
+    async def ask_all():
+        return await asyncio.gather(*(batcher.embed_query(text) for text in ["a", "bb", "ccc"]))
+
+    vectors = asyncio.run(ask_all())
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert embeddings.calls == [["a", "bb", "ccc"]]
+
+
+def test_batches_are_capped_at_max_batch():
+    embeddings = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(embeddings, max_batch=2)
+
+    async def ask_all():
+        return await asyncio.gather(*(batcher.embed_query(text) for text in ["a", "bb", "ccc"]))
+
+    vectors = asyncio.run(ask_all())
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert embeddings.calls == [["a", "bb"], ["ccc"]]
+
+
+def test_model_failure_reaches_every_waiting_question():
+    batcher = EmbeddingBatcher(RecordingEmbeddings(fail=True))
+
+    async def ask_all():
+        return await asyncio.gather(
+            batcher.embed_query("a"), batcher.embed_query("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(ask_all())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batcher_restarts_on_a_new_event_loop():
+    embeddings = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(embeddings)
+
+    assert asyncio.run(batcher.embed_query("a")) == [1.0]
+    assert asyncio.run(batcher.embed_query("bb")) == [2.0]
+    assert embeddings.calls == [["a"], ["bb"]]
@@ -0,0 +1,95 @@
+"""
+HTML page route tests (conditional requests)
+The app is used without its lifespan, so no services are built
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("torch")
+pytest.importorskip("langchain_chroma")
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("API_KEY", "test")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_html_page_has_validators(client):
+    response = client.get("/admin")
+
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    assert response.headers["last-modified"]
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = client.get("/admin").headers["etag"]
+
+    response = client.get("/admin", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_matching_etag_in_a_list_is_not_modified(client):
+    etag = client.get("/admin").headers["etag"]
+
+    response = client.get("/admin", headers={"If-None-Match": f'"other", W/{etag}'})
+
+    assert response.status_code == 304
+
+
+def test_mismatched_etag_returns_the_page(client):
+    response = client.get("/admin", headers={"If-None-Match": '"not-the-etag"'})
+
+    assert response.status_code == 200
+    assert response.content
+
+
+def test_wildcard_etag_is_not_modified(client):
+    response = client.get("/admin", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 304
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    last_modified = client.get("/admin").headers["last-modified"]
+
+    response = client.get("/admin", headers={
+        "If-None-Match": '"not-the-etag"',
+        "If-Modified-Since": last_modified,
+    })
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("deflate, GZIP;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("br, *", True),
+    ("*;q=0", False),
+    ("*, gzip;q=0", False),
+    ("x-gzip-like", False),
+    ("identity", False),
+    ("", False),
+])
+def test_root_negotiates_gzip(client, accept_encoding, gzipped):
+    response = client.get("/", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 200
+    assert (response.headers.get("content-encoding") == "gzip") == gzipped
+    assert response.headers["vary"] == "Accept-Encoding"
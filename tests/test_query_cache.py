@@ -0,0 +1,165 @@
+"""
+Query cache tests
+"""
+
+import math
+import types
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from app.services import query_cache
+from app.services.query_cache import AnswerCache, CachedEmbeddings
+
+
+QUESTION = "What does John 3:16 say?"
+VECTOR = [1.0, 0.0]
+
+
+def _unit(cosine):
+    """Normalized 2-d vector with the given cosine similarity to VECTOR"""
+    return [cosine, math.sqrt(1.0 - cosine * cosine)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_exact_question_hits_after_normalization():
+    cache = AnswerCache(threshold=1.0)
+    cache.put(QUESTION, VECTOR, "kjv", 3, {'answer': "For God so loved"})
+
+    assert cache.get("  what does JOHN 3:16   say? ", VECTOR, "kjv", 3)['answer'] == "For God so loved"
+
+
+@pytest.mark.parametrize("cosine, hit", [
+    (0.5, True),
+    (0.4999, False),
+])
+def test_similarity_threshold_is_inclusive(cosine, hit):
+    cache = AnswerCache(threshold=0.5)
+    cache.put("Who was Moses?", VECTOR, "kjv", 3, {'answer': "A prophet"})
+
+    result = cache.get("Tell me about Moses", _unit(cosine), "kjv", 3)
+
+    assert (result is not None) == hit
+
+
+def test_threshold_of_one_disables_similar_matches():
+    cache = AnswerCache(threshold=1.0)
+    cache.put("Who was Moses?", VECTOR, "kjv", 3, {'answer': "A prophet"})
+
+    assert cache.get("Tell me about Moses", VECTOR, "kjv", 3) is None
+
+
+def test_answers_expire_after_ttl(clock):
+    cache = AnswerCache(ttl=300)
+    cache.put(QUESTION, VECTOR, "kjv", 3, {'answer': "For God so loved"})
+
+    clock[0] += 299
+    assert cache.get(QUESTION, VECTOR, "kjv", 3) is not None
+    assert cache.get("What does John 3:16 say", VECTOR, "kjv", 3) is not None
+
+    clock[0] += 2
+    assert cache.get(QUESTION, VECTOR, "kjv", 3) is None
+    assert cache.get("What does John 3:16 say", VECTOR, "kjv", 3) is None
+
+
+def test_similar_question_about_another_verse_misses():
+    cache = AnswerCache(threshold=0.9)
+    cache.put(QUESTION, VECTOR, "kjv", 3, {'answer': "John 3:16"}, reference="John 3:16")
+
+    assert cache.get("What does John 3:17 say?", VECTOR, "kjv", 3, reference="John 3:17") is None
+    assert cache.get("What does John 3:17 say?", VECTOR, "kjv", 3) is None
+    assert cache.get("What does John 3:16 say??", VECTOR, "kjv", 3, reference="John 3:16") is not None
+
+
+@pytest.mark.parametrize("translation_id, k", [
+    ("niv", 3),
+    ("kjv", 5),
+    ("kjv", None),
+])
+def test_answers_are_separated_by_translation_and_k(translation_id, k):
+    cache = AnswerCache(threshold=0.9)
+    cache.put(QUESTION, VECTOR, "kjv", 3, {'answer': "For God so loved"})
+
+    assert cache.get(QUESTION, VECTOR, translation_id, k) is None
+    assert cache.get("What does John 3:16 say", VECTOR, translation_id, k) is None
+
+
+def test_returned_answer_does_not_alias_the_cache():
+    cache = AnswerCache(threshold=0.9)
+    cache.put(QUESTION, VECTOR, "kjv", 3, {'answer': "For God so loved", 'question': QUESTION})
+
+    exact = cache.get(QUESTION, VECTOR, "kjv", 3)
+    exact['question'] = "changed"
+    exact['answer'] = "changed"
+    similar = cache.get("What does John 3:16 say", VECTOR, "kjv", 3)
+    similar['answer'] = "changed"
+
+    assert cache.get(QUESTION, VECTOR, "kjv", 3) == {'answer': "For God so loved", 'question': QUESTION}
+
+
+def test_invalidate_drops_only_that_translation():
+    cache = AnswerCache()
+    cache.put(QUESTION, VECTOR, "kjv", 3, {'answer': "kjv"})
+    cache.put(QUESTION, VECTOR, "niv", 3, {'answer': "niv"})
+
+    cache.invalidate("kjv")
+
+    assert cache.get(QUESTION, VECTOR, "kjv", 3) is None
+    assert cache.get(QUESTION, VECTOR, "niv", 3)['answer'] == "niv"
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_cached_embeddings_only_embed_misses():
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, max_size=4)
+
+    embeddings.embed_query("a")
+    vectors = embeddings.embed_queries(["a", "bb", "a"])
+
+    assert vectors == [[1.0], [2.0], [1.0]]
+    assert model.calls == [["a"], ["bb"]]
+
+
+def test_cached_embeddings_evict_least_recently_used():
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, max_size=2)
+
+    embeddings.embed_query("a")
+    embeddings.embed_query("bb")
+    embeddings.embed_query("a")  # "a" is now the most recently used
+    embeddings.embed_query("ccc")  # evicts "bb"
+    model.calls.clear()
+
+    embeddings.embed_query("a")
+    embeddings.embed_query("bb")
+
+    assert model.calls == [["bb"]]
+
+
+def test_cached_embeddings_pass_documents_through():
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, max_size=2)
+
+    embeddings.embed_documents(["a", "a"])
+    embeddings.embed_documents(["a"])
+
+    assert model.calls == [["a", "a"], ["a"]]
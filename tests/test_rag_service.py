@@ -0,0 +1,309 @@
+"""
+RAGService retrieval tests
+The service is built without __init__, so no embedding model, Chroma or Groq is needed
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_chroma")
+pytest.importorskip("torch")
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("API_KEY", "test")
+
+from langchain_core.documents import Document
+
+from app.services import rag_service as rag_module
+from app.services.query_cache import AnswerCache, RetrievalCache
+from app.services.rag_service import RAGService
+
+
+class StubEmbeddings:
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+SEMANTIC_DOC = Document(page_content="semantic hit", metadata={})
+
+
+@pytest.fixture
+def service(monkeypatch):
+    svc = RAGService.__new__(RAGService)
+    svc.vectorstore = "kjv-store"
+    svc.current_translation = "kjv"
+    svc.embeddings = StubEmbeddings()
+    svc.retrieval_cache = RetrievalCache()
+
+    semantic_calls = []
+    monkeypatch.setattr(rag_module, "get_vectorstore", lambda translation_id: f"{translation_id}-store")
+
+    def fake_semantic_search(translation_id, query_vector, k):
+        semantic_calls.append((translation_id, k))
+        return [(SEMANTIC_DOC, 0.1)]
+
+    monkeypatch.setattr(rag_module, "semantic_search", fake_semantic_search)
+    svc.semantic_calls = semantic_calls
+    return svc
+
+
+def _stub_verse_lookup(monkeypatch, result):
+    lookups = []
+
+    def fake_fetch(vectorstore, verse_ref, book_names, limit):
+        lookups.append(vectorstore)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(RAGService, "_fetch_verse_range", staticmethod(fake_fetch))
+    return lookups
+
+
+def test_falls_back_to_semantic_search_when_reference_has_no_verses(service, monkeypatch):
+    # "about the 10" parses as a reference but matches no verse metadata
+    _stub_verse_lookup(monkeypatch, [])
+    assert service._extract_verse_reference("Tell me about the 10 commandments") is not None
+
+    chunks = service._retrieve_relevant_chunks("Tell me about the 10 commandments", "kjv", k=3)
+
+    assert [chunk['content'] for chunk in chunks] == ["semantic hit"]
+    assert service.semantic_calls == [("kjv", 3)]
+
+
+def test_falls_back_to_semantic_search_when_verse_lookup_fails(service, monkeypatch):
+    _stub_verse_lookup(monkeypatch, ValueError("bad where clause"))
+
+    chunks = service._retrieve_relevant_chunks("What does John 3:16 say?", "kjv", k=3)
+
+    assert [chunk['content'] for chunk in chunks] == ["semantic hit"]
+    assert service.semantic_calls == [("kjv", 3)]
+
+
+def test_exact_reference_skips_semantic_search(service, monkeypatch):
+    verse = Document(
+        page_content="For God so loved the world",
+        metadata={'book': "John", 'chapter': 3, 'verse_start': 16, 'verse_end': 16}
+    )
+    _stub_verse_lookup(monkeypatch, [verse])
+
+    chunks = service._retrieve_relevant_chunks("What does John 3:16 say?", "kjv", k=3)
+
+    assert [chunk['content'] for chunk in chunks] == ["For God so loved the world"]
+    assert service.semantic_calls == []
+
+
+def test_retrieval_searches_the_given_translation(service, monkeypatch):
+    lookups = _stub_verse_lookup(monkeypatch, [])
+    service.current_translation = "niv"
+
+    service._retrieve_relevant_chunks("What does John 3:16 say?", "kjv", k=3)
+
+    assert lookups == ["kjv-store"]
+    assert service.semantic_calls == [("kjv", 3)]
+
+
+def test_switch_during_embedding_does_not_change_answering_translation(service, monkeypatch):
+    question = "Who was Moses?"
+
+    class SwitchingBatcher:
+        # Another request switches translation while this question is being embedded
+        async def embed_query(self, text):
+            service.current_translation = "niv"
+            service.vectorstore = "niv-store"
+            return [1.0, 0.0]
+
+    async def fake_complete(prompt, system_prompt=None):
+        return "answer"
+
+    service.query_batcher = SwitchingBatcher()
+    service.answer_cache = AnswerCache()
+    service._acomplete = fake_complete
+    service._translation_info = lambda translation_id: {'id': translation_id, 'name': translation_id.upper()}
+
+    result = asyncio.run(service.aquery(question, k=3))
+
+    assert result['translation']['id'] == "kjv"
+    assert service.semantic_calls == [("kjv", 3)]
+    assert service.answer_cache.get(question, [1.0, 0.0], "kjv", 3) is not None
+    assert service.answer_cache.get(question, [1.0, 0.0], "niv", 3) is None
+
+
+@pytest.fixture
+def comparing(service, monkeypatch):
+    calls = []
+
+    class FixedBatcher:
+        async def embed_query(self, text):
+            return [1.0, 0.0]
+
+    async def fake_compare(question, translation_ids, verse_ref, k, metadata):
+        calls.append((verse_ref['reference'], tuple(translation_ids)))
+        return {'success': True, 'question': question, 'comparisons': [{'reference': verse_ref['reference']}]}
+
+    service.query_batcher = FixedBatcher()
+    service.comparison_cache = AnswerCache()
+    service._check_comparison_request = lambda question, translation_ids: (None, {})
+    service._acompare_specific_verses = fake_compare
+    service.compare_calls = calls
+    return service
+
+
+def test_repeat_comparison_is_served_from_cache(comparing):
+    first = asyncio.run(comparing.acompare_translations("John 3:16", ["kjv", "niv"], k=3))
+    second = asyncio.run(comparing.acompare_translations("john  3:16 ", ["kjv", "niv"], k=3))
+
+    assert comparing.compare_calls == [("John 3:16", ("kjv", "niv"))]
+    assert second['comparisons'] == first['comparisons']
+    assert second['question'] == "john  3:16 "
+
+
+def test_comparison_cache_is_keyed_on_translations_and_reference(comparing):
+    asyncio.run(comparing.acompare_translations("John 3:16", ["kjv", "niv"], k=3))
+    asyncio.run(comparing.acompare_translations("John 3:16", ["kjv", "esv"], k=3))
+    asyncio.run(comparing.acompare_translations("John 3:17", ["kjv", "niv"], k=3))
+
+    assert comparing.compare_calls == [
+        ("John 3:16", ("kjv", "niv")),
+        ("John 3:16", ("kjv", "esv")),
+        ("John 3:17", ("kjv", "niv")),
+    ]
+
+
+def test_failed_comparison_is_not_cached(comparing):
+    async def failing_compare(question, translation_ids, verse_ref, k, metadata):
+        comparing.compare_calls.append(verse_ref['reference'])
+        return {'success': False, 'question': question, 'comparisons': []}
+
+    comparing._acompare_specific_verses = failing_compare
+
+    asyncio.run(comparing.acompare_translations("John 3:16", ["kjv", "niv"], k=3))
+    asyncio.run(comparing.acompare_translations("John 3:16", ["kjv", "niv"], k=3))
+
+    assert comparing.compare_calls == ["John 3:16", "John 3:16"]
+
+
+JOHN_3_16_18 = {'book': "John", 'chapter': 3, 'verse_start': 16, 'verse_end': 18, 'reference': "John 3:16-18"}
+
+
+def _chroma_collection(rows):
+    """Ephemeral Chroma collection holding (text, metadata) rows"""
+    chromadb = pytest.importorskip("chromadb")
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"verses_{len(client.list_collections())}")
+    collection.add(
+        ids=[str(i) for i in range(len(rows))],
+        embeddings=[[1.0, 0.0]] * len(rows),
+        documents=[text for text, _ in rows],
+        metadatas=[meta for _, meta in rows],
+    )
+    return collection
+
+
+def _verse(book, chapter, verse):
+    return (f"{book} {chapter}:{verse}", {'book': book, 'chapter': chapter, 'verse_start': verse, 'verse_end': verse})
+
+
+def test_verse_range_filter_matches_chunks_starting_in_range():
+    where = RAGService._verse_range_filter(JOHN_3_16_18, ["John", "Gospel of John"])
+
+    assert where == {
+        "$and": [
+            {"book": {"$in": ["John", "Gospel of John"]}},
+            {"chapter": {"$eq": 3}},
+            {"verse_start": {"$gte": 16}},
+            {"verse_start": {"$lte": 18}},
+        ]
+    }
+
+
+def test_verse_range_filter_is_accepted_by_chroma():
+    collection = _chroma_collection([
+        _verse("John", 3, 15), _verse("John", 3, 16), _verse("Gospel of John", 3, 17),
+        _verse("John", 3, 18), _verse("John", 3, 19), _verse("John", 4, 16), _verse("Luke", 3, 16),
+    ])
+
+    data = collection.get(where=RAGService._verse_range_filter(JOHN_3_16_18, ["John", "Gospel of John"]))
+
+    assert sorted(data['documents']) == ["Gospel of John 3:17", "John 3:16", "John 3:18"]
+
+
+class RecordingCollection:
+    """Chroma collection wrapper that records each get()'s where-clause"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.queries = []
+
+    def get(self, **kwargs):
+        self.queries.append(kwargs['where'])
+        return self.collection.get(**kwargs)
+
+    def store(self):
+        """A stand-in vector store exposing this as its _collection"""
+        return type("Store", (), {'_collection': self})()
+
+
+def test_whole_chapter_reference_covers_every_verse(service):
+    verse_ref = service._extract_verse_reference("John 10")
+
+    assert (verse_ref['chapter'], verse_ref['verse_start'], verse_ref['verse_end']) == (10, 1, 999)
+    assert RAGService._verse_range_filter(verse_ref, ["John"])["$and"][2:] == [
+        {"verse_start": {"$gte": 1}},
+        {"verse_start": {"$lte": 999}},
+    ]
+
+
+def test_whole_chapter_lookup_returns_the_chapter_in_verse_order(service, monkeypatch):
+    collection = _chroma_collection([
+        _verse("John", 10, 30), _verse("John", 10, 1), _verse("John", 11, 1), _verse("John", 9, 41),
+    ])
+    vectorstore = RecordingCollection(collection).store()
+    verse_ref = service._extract_verse_reference("John 10")
+
+    documents = RAGService._fetch_verse_range(vectorstore, verse_ref, ["John"], limit=10)
+
+    assert [doc.page_content for doc in documents] == ["John 10:1", "John 10:30"]
+
+
+def test_several_references_are_fetched_with_one_or_query(service, monkeypatch):
+    collection = _chroma_collection([
+        _verse("John", 3, 16), _verse("Gospel of John", 1, 1), _verse("Romans", 8, 28),
+    ])
+    recording = RecordingCollection(collection)
+    monkeypatch.setattr(rag_module, "get_vectorstore", lambda translation_id: recording.store())
+    references = [
+        {'book': "John", 'chapter': 3, 'verse_start': 16, 'verse_end': 16},
+        {'book': "John", 'chapter': 1, 'verse_start': 1, 'verse_end': 1},
+        {'book': "Genesis", 'chapter': 1, 'verse_start': 1, 'verse_end': 1},
+    ]
+
+    texts = service._fetch_verse_texts("kjv", references)
+
+    assert texts == ["John 3:16", "Gospel of John 1:1", None]
+    assert len(recording.queries) == 1
+    assert [clause["$and"][0]["book"]["$in"][0] for clause in recording.queries[0]["$or"]] == ["John", "John", "Genesis"]
+
+
+def test_single_reference_is_fetched_without_or(service, monkeypatch):
+    collection = _chroma_collection([_verse("John", 3, 16)])
+    recording = RecordingCollection(collection)
+    monkeypatch.setattr(rag_module, "get_vectorstore", lambda translation_id: recording.store())
+
+    texts = service._fetch_verse_texts("kjv", [{'book': "John", 'chapter': 3, 'verse_start': 16, 'verse_end': 16}])
+
+    assert texts == ["John 3:16"]
+    assert "$or" not in recording.queries[0]
+
+
+@pytest.mark.parametrize("question, reference", [
+    ("John 3:16", "John 3:16"),
+    ("John 3:16-18", "John 3:16-18"),
+    ("John 10", "John 10"),
+    ("John 10:1", "John 10:1"),
+])
+def test_references_distinguish_whole_chapters_from_verses(service, question, reference):
+    assert service._question_reference(question) == reference
@@ -0,0 +1,61 @@
+"""
+STT post-processing tests
+"""
+
+import os
+import re
+
+import pytest
+
+pytest.importorskip("groq")
+pytest.importorskip("pydantic_settings")
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("API_KEY", "test")
+
+from app.services.stt_service import CORRECTIONS, STTService
+
+
+def sequential_fix(text):
+    """The original implementation: one re.sub() per correction, in dict order"""
+    for wrong, correct in CORRECTIONS.items():
+        text = re.sub(re.escape(wrong), correct, text, flags=re.IGNORECASE)
+    return text
+
+
+@pytest.fixture
+def stt():
+    # fix_common_mistakes() needs no Groq client
+    return STTService.__new__(STTService)
+
+
+@pytest.mark.parametrize("text", [
+    "I signed up for gain skills last week",
+    "GAIN SKILLS and Gang Skills and games skills",
+    "Is code quest free? What about Coat Quest or COLD QUEST?",
+    "The code price course, from game skills.",
+    "Gaines skills offers AWS training",
+    "Nothing to correct here",
+    "",
+])
+def test_matches_sequential_replacement(stt, text):
+    assert stt.fix_common_mistakes(text) == sequential_fix(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("gain skills", "GainSkills"),
+    ("GAIN SKILLS", "GainSkills"),
+    ("Code Quest.", "CodeQuest."),
+    ("the interview coach", "the AI Interview Coach"),
+    # The longer phrase wins, and the result is not corrected again
+    # (the sequential version produced "AI AI Interview Coach")
+    ("the ai interview coach", "the AI Interview Coach"),
+    ("The AI Interview Coach", "The AI Interview Coach"),
+    # Whole words only
+    ("decode quest", "decode quest"),
+    ("code prices", "code prices"),
+    ("megame skills", "megame skills"),
+    ("code quest's levels", "CodeQuest's levels"),
+])
+def test_corrections(stt, text, expected):
+    assert stt.fix_common_mistakes(text) == expected